@@ -1,8 +1,7 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from datetime import datetime
-import numpy as np
+from pipeline_rh import count_values, load_hr_data
 
 # Configuration pour l'affichage des graphiques
 plt.style.use('seaborn-v0_8')
@@ -19,31 +18,8 @@ class AnalyseRH:
     def load_and_clean_data(self, filepath):
         """Charge et nettoie les données RH"""
         try:
-            # Chargement du fichier CSV
-            df = pd.read_csv(filepath, sep=';', encoding='latin-1')
-            
-            # Suppression des colonnes vides
-            df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-            df = df.dropna(how='all', axis=1)
-            
-            # Suppression des lignes vides
-            df = df.dropna(how='all')
-            
-            # Nettoyage des noms de colonnes
-            df.columns = df.columns.str.strip()
-            
-            # Conversion des dates
-            if 'Date de naissance' in df.columns:
-                df['Date de naissance'] = pd.to_datetime(df['Date de naissance'], format='%d/%m/%Y', errors='coerce')
-            
-            if 'DateEntree' in df.columns:
-                df['DateEntree'] = pd.to_datetime(df['DateEntree'], format='%d/%m/%Y', errors='coerce')
-            
-            # Nettoyage des colonnes textuelles
-            text_columns = ['Sexe', 'Situation Civile', 'Type de contrat', 'Direction', 'Déparetement']
-            for col in text_columns:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).str.strip()
+            # Pipeline commun : nettoyage, typage et colonnes calculées (snapshot disque partagé)
+            df = load_hr_data(filepath)
             
             print(f"Données chargées avec succès: {len(df)} employés")
             return df
@@ -57,24 +33,11 @@ class AnalyseRH:
         if self.df is None:
             return
         
-        # Calcul de l'âge actuel
-        if 'Date de naissance' in self.df.columns:
-            today = datetime.now()
-            self.df['Age_calcule'] = ((today - self.df['Date de naissance']).dt.days / 365.25).round()
-        
-        # Calcul de l'ancienneté
-        if 'DateEntree' in self.df.columns:
-            self.df['Anciennete_calculee'] = ((datetime.now() - self.df['DateEntree']).dt.days / 365.25).round(1)
-        
         # Tranches d'âge
         if 'Age_calcule' in self.df.columns:
             bins = [0, 25, 35, 45, 55, 100]
             labels = ['<25', '25-34', '35-44', '45-54', '55+']
             self.df['Tranche_age'] = pd.cut(self.df['Age_calcule'], bins=bins, labels=labels, right=False)
-        
-        # Standardisation du sexe
-        if 'Sexe' in self.df.columns:
-            self.df['Sexe'] = self.df['Sexe'].map({'M': 'Masculin', 'F': 'Féminin'}).fillna(self.df['Sexe'])
     
     def display_summary_stats(self):
         """Affiche les statistiques descriptives"""
@@ -94,7 +57,7 @@ class AnalyseRH:
         # Répartition par sexe
         if 'Sexe' in self.df.columns:
             print("\nRépartition par sexe:")
-            sexe_counts = self.df['Sexe'].value_counts()
+            sexe_counts = count_values(self.df['Sexe'])
             for sexe, count in sexe_counts.items():
                 percentage = (count / len(self.df)) * 100
                 print(f"  {sexe}: {count} ({percentage:.1f}%)")
@@ -102,7 +65,7 @@ class AnalyseRH:
         # Répartition par type de contrat
         if 'Type de contrat' in self.df.columns:
             print("\nRépartition par type de contrat:")
-            contrat_counts = self.df['Type de contrat'].value_counts()
+            contrat_counts = count_values(self.df['Type de contrat'])
             for contrat, count in contrat_counts.items():
                 percentage = (count / len(self.df)) * 100
                 print(f"  {contrat}: {count} ({percentage:.1f}%)")
@@ -114,7 +77,7 @@ class AnalyseRH:
         
         # 1. Répartition par sexe
         if 'Sexe' in self.df.columns:
-            sexe_counts = self.df['Sexe'].value_counts()
+            sexe_counts = count_values(self.df['Sexe'])
             axes[0, 0].pie(sexe_counts.values, labels=sexe_counts.index, autopct='%1.1f%%')
             axes[0, 0].set_title('Répartition par sexe')
         
@@ -127,7 +90,7 @@ class AnalyseRH:
         
         # 3. Employés par direction (top 10)
         if 'Direction' in self.df.columns:
-            direction_counts = self.df['Direction'].value_counts().head(10)
+            direction_counts = count_values(self.df['Direction']).head(10)
             axes[0, 2].barh(range(len(direction_counts)), direction_counts.values)
             axes[0, 2].set_yticks(range(len(direction_counts)))
             axes[0, 2].set_yticklabels(direction_counts.index, fontsize=8)
@@ -136,7 +99,7 @@ class AnalyseRH:
         
         # 4. Types de contrat
         if 'Type de contrat' in self.df.columns:
-            contrat_counts = self.df['Type de contrat'].value_counts()
+            contrat_counts = count_values(self.df['Type de contrat'])
             axes[1, 0].bar(range(len(contrat_counts)), contrat_counts.values, color='lightcoral')
             axes[1, 0].set_xticks(range(len(contrat_counts)))
             axes[1, 0].set_xticklabels(contrat_counts.index, rotation=45, ha='right')
@@ -182,7 +145,7 @@ class AnalyseRH:
         
         # Raisons de départ
         print("\nRaisons de départ:")
-        raisons = departs['Observation'].value_counts()
+        raisons = count_values(departs['Observation'])
         for raison, count in raisons.items():
             percentage = (count / len(departs)) * 100
             print(f"  {raison}: {count} ({percentage:.1f}%)")
@@ -217,7 +180,7 @@ class AnalyseRH:
             return
         
         # Statistiques par département
-        dept_stats = self.df.groupby('Déparetement').agg({
+        dept_stats = self.df.groupby('Déparetement', observed=True).agg({
             'Matricule': 'count',
             'Age_calcule': 'mean' if 'Age_calcule' in self.df.columns else lambda x: 0,
             'Anciennete_calculee': 'mean' if 'Anciennete_calculee' in self.df.columns else lambda x: 0,
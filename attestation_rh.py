@@ -0,0 +1,623 @@
+# Attestations de travail : modèle DOCX compilé une fois, rendu par employé
+import copy
+import io
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+try:
+    from docx import Document
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+# Nombre d'attestations rendues par tâche d'un processus de travail
+BATCH_CHUNK = 25
+
+# Débit visé en génération par lot (attestations par seconde)
+BATCH_TARGET_RATE = 100
+
+# Mois en français (dates de naissance / d'entrée, et date du jour)
+MOIS_FR = {
+    1: 'janvier', 2: 'février', 3: 'mars', 4: 'avril', 5: 'mai', 6: 'juin',
+    7: 'juillet', 8: 'août', 9: 'septembre', 10: 'octobre', 11: 'novembre', 12: 'décembre'
+}
+
+
+def format_date_french(date_obj, capitalize=False):
+    """Formate une date en français ('4 septembre 2022')"""
+    if pd.isna(date_obj):
+        return "Non renseigné"
+    try:
+        mois = MOIS_FR[date_obj.month]
+        return f"{date_obj.day} {mois.capitalize() if capitalize else mois} {date_obj.year}"
+    except (AttributeError, KeyError):
+        return str(date_obj)
+
+
+def default_reference(employee_data, today=None):
+    """
+    Référence par défaut d'une attestation ('1738 (ADM/DRH/2025)')
+
+    Le matricule est lu comme texte ('01738') : les zéros de tête sont ôtés pour
+    garder la référence numérique utilisée jusqu'ici.
+    """
+    today = today or datetime.now()
+    matricule = str(employee_data.get('Matricule', '1261')).strip().lstrip('0') or '0'
+    return f"{matricule} (ADM/DRH/{today.year})"
+
+
+def certificate_replacements(employee_data, custom_reference=None, today=None):
+    """
+    Textes du modèle PROMASIDOR à remplacer et leurs valeurs pour un employé
+
+    Les clés (textes d'exemple du modèle et placeholders génériques) sont les
+    mêmes pour tous les employés : elles servent à compiler le modèle.
+    """
+    today = today or datetime.now()
+    nom_complet = f"{employee_data.get('Nom', '')} {employee_data.get('Prenoms', '')}".strip()
+    date_naissance = format_date_french(employee_data.get('Date de naissance'))
+    date_entree = format_date_french(employee_data.get('DateEntree'))
+    date_generation = format_date_french(today, capitalize=True)
+    lieu_naissance = employee_data.get('Lieu de naissance', employee_data.get('Adresse', 'Non renseigné'))
+    poste = employee_data.get('Poste', 'Non renseigné')
+
+    # Préparer la référence à utiliser
+    if custom_reference:
+        reference_finale = custom_reference
+    else:
+        reference_finale = default_reference(employee_data, today)
+
+    return {
+        # Informations spécifiques au modèle
+        'CHOUIKRAT Smail': nom_complet,
+        '27 Juin 1990': date_naissance,
+        'Hussin dey ,Alger': lieu_naissance,
+        '04 Septembre 2022': date_entree,
+        'de Head of strategy Sales': f"de {poste}",
+        'Head of strategy Sales': poste,
+
+        # Placeholders génériques si ils existent
+        '[NOM_COMPLET]': nom_complet,
+        '[DATE_NAISSANCE]': date_naissance,
+        '[LIEU_NAISSANCE]': lieu_naissance,
+        '[POSTE]': poste,
+        '[DATE_ENTREE]': date_entree,
+        '[DATE_GENERATION]': date_generation,
+        '[REFERENCE]': reference_finale,
+
+        # Mise à jour de la date dans l'en-tête
+        '23/06/2025': today.strftime('%d/%m/%Y'),
+        'le 23/06/2025': f"le {today.strftime('%d/%m/%Y')}",
+
+        # Mise à jour de la référence - plusieurs formats possibles
+        '1261 (ADM/DRH/2025)': reference_finale,
+        '1261 (ADM/DRH/2025': reference_finale,  # Sans parenthèse fermante
+        'Réf : 1261 (ADM/DRH/2025)': f"Réf : {reference_finale}",
+        'Ref : 1261 (ADM/DRH/2025)': f"Ref : {reference_finale}",
+        'N° : 1261 (ADM/DRH/2025)': f"N° : {reference_finale}",
+        'Référence : 1261 (ADM/DRH/2025)': f"Référence : {reference_finale}",
+    }
+
+
+def placeholder_pattern(placeholders):
+    """
+    Expression régulière reconnaissant tous les textes à remplacer en une passe
+
+    Les alternatives sont triées de la plus longue à la plus courte : à chaque
+    position, le texte le plus long l'emporte ('Réf : 1261 (ADM/DRH/2025)' avant
+    '1261 (ADM/DRH/2025)', 'le 23/06/2025' avant '23/06/2025').
+    """
+    keys = sorted({key for key in placeholders if key}, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(key) for key in keys)) if keys else None
+
+
+def replace_in_paragraph(paragraph, pattern, replacements):
+    """
+    Remplace tous les textes reconnus d'un paragraphe, en une lecture et une reconstruction
+
+    Le paragraphe est reconstruit avec le formatage de son premier run, les
+    valeurs remplacées étant mises en gras.
+
+    Returns:
+        Textes remplacés (sans doublon, dans l'ordre d'apparition)
+    """
+    full_text = paragraph.text
+    matches = list(pattern.finditer(full_text))
+    if not matches:
+        return []
+
+    # Sauvegarder le formatage original
+    original_formatting = {}
+    if paragraph.runs:
+        original_formatting = {
+            'font_name': paragraph.runs[0].font.name,
+            'font_size': paragraph.runs[0].font.size,
+            'bold': paragraph.runs[0].bold,
+            'italic': paragraph.runs[0].italic
+        }
+
+    # Nettoyer tous les runs
+    for run in paragraph.runs:
+        run.clear()
+
+    def add_run(text, bold):
+        run = paragraph.add_run(text)
+        if original_formatting.get('font_name'):
+            run.font.name = original_formatting['font_name']
+        if original_formatting.get('font_size'):
+            run.font.size = original_formatting['font_size']
+        run.bold = bold
+        run.italic = original_formatting.get('italic', False)
+
+    # Reconstruire le paragraphe : texte normal au formatage original, valeurs EN GRAS
+    position = 0
+    for match in matches:
+        if match.start() > position:
+            add_run(full_text[position:match.start()], original_formatting.get('bold', False))
+        add_run(replacements[match.group()], True)
+        position = match.end()
+    if position < len(full_text):
+        add_run(full_text[position:], original_formatting.get('bold', False))
+    return list(dict.fromkeys(match.group() for match in matches))
+
+
+def _paragraphs(document):
+    """Parcourt les paragraphes du document : (libellé, adresse, paragraphe)"""
+    for i, paragraph in enumerate(document.paragraphs):
+        yield 'Paragraphe', ('body', i), paragraph
+    for t, table in enumerate(document.tables):
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                for p, paragraph in enumerate(cell.paragraphs):
+                    yield 'Tableau', ('table', t, r, c, p), paragraph
+    for s, section in enumerate(document.sections):
+        for p, paragraph in enumerate(section.header.paragraphs):
+            yield 'En-tête', ('header', s, p), paragraph
+        for p, paragraph in enumerate(section.footer.paragraphs):
+            yield 'Pied de page', ('footer', s, p), paragraph
+
+
+def _resolve(document, address):
+    """Paragraphe d'un document à une adresse relevée par _paragraphs"""
+    kind = address[0]
+    if kind == 'body':
+        return document.paragraphs[address[1]]
+    if kind == 'table':
+        _, t, r, c, p = address
+        return document.tables[t].rows[r].cells[c].paragraphs[p]
+    section = document.sections[address[1]]
+    part = section.header if kind == 'header' else section.footer
+    return part.paragraphs[address[2]]
+
+
+class CompiledTemplate:
+    """
+    Modèle DOCX lu et analysé une fois
+
+    Le document est chargé une seule fois, et les paragraphes (corps, tableaux,
+    en-têtes, pieds de page) contenant au moins un des textes à remplacer sont
+    relevés à la compilation par une expression unique. Une attestation part
+    d'une copie en mémoire du document analysé et ne modifie que ces
+    paragraphes, chacun étant relu et reconstruit une seule fois.
+    """
+
+    def __init__(self, path, placeholders):
+        """Charge le modèle et relève l'emplacement des textes à remplacer"""
+        self.path = path
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self.placeholders = tuple(placeholders)
+        self.pattern = placeholder_pattern(self.placeholders)
+        self.document = Document(path)
+
+        # Un paragraphe partagé (cellules fusionnées, en-tête lié) n'est relevé qu'une fois
+        self.locations = []
+        seen = set()
+        for label, address, paragraph in _paragraphs(self.document):
+            if paragraph._p in seen:
+                continue
+            seen.add(paragraph._p)
+            if self.pattern is not None and self.pattern.search(paragraph.text):
+                self.locations.append((label, address))
+
+        self._compile_package()
+        self.merge = None
+
+    def _compile_package(self):
+        """
+        Prépare le rendu au niveau XML du paquet DOCX
+
+        Les paragraphes relevés sont reconstruits une fois sur une copie du modèle,
+        avec un marqueur à la place de chaque valeur ; le XML des parties touchées
+        (corps, en-têtes, pieds de page) est alors découpé en fragments fixes
+        autour des marqueurs. Les autres membres de l'archive (images, styles,
+        thème, numérotation...) sont recopiés octet pour octet dans une archive
+        de base, écrite une fois.
+        """
+        document = copy.deepcopy(self.document.part).document
+        keys = []
+
+        def marker(text):
+            # Marqueur entouré d'espaces : le w:t reçoit xml:space="preserve" comme une valeur quelconque
+            keys.append(text)
+            return f" \ue000{len(keys) - 1}\ue001 "
+
+        self.debug_info = []
+        parts = {}
+        for label, address in self.locations:
+            paragraph = _resolve(document, address)
+            replaced = replace_in_paragraph(paragraph, self.pattern, _Markers(marker))
+            self.debug_info.extend((label, old_text) for old_text in replaced)
+            parts[paragraph.part.partname.lstrip('/')] = paragraph.part
+
+        # Parties modifiées : fragments de XML fixes et clés des valeurs à insérer entre eux
+        self.parts = {}
+        for name, part in parts.items():
+            pieces = _MARKER.split(part.blob.decode('utf-8'))
+            self.parts[name] = ([piece.encode('utf-8') for piece in pieces[::2]],
+                                [keys[int(index)] for index in pieces[1::2]])
+
+        # Archive de base : tous les membres non modifiés, dans leur compression d'origine
+        base = io.BytesIO()
+        with zipfile.ZipFile(self.path) as source, zipfile.ZipFile(base, 'w') as target:
+            for info in source.infolist():
+                if info.filename not in self.parts:
+                    target.writestr(info, source.read(info))
+        self.base = base.getvalue()
+
+    def render(self, replacements, debug_mode=False):
+        """
+        Applique les remplacements sur une copie du modèle
+
+        Returns:
+            (document python-docx, liste des remplacements effectués si debug_mode)
+        """
+        # Copie du paquet (parties et XML analysé) : le document est rattaché à sa partie copiée
+        document = copy.deepcopy(self.document.part).document
+        replacements_made = []
+        for label, address in self.locations:
+            replaced = replace_in_paragraph(_resolve(document, address), self.pattern, replacements)
+            if debug_mode:
+                replacements_made.extend(f"{label}: '{old_text}' → '{replacements[old_text]}'" for old_text in replaced)
+        return document, replacements_made
+
+    def render_bytes(self, replacements, debug_mode=False):
+        """
+        Attestation .docx produite au niveau XML, sans analyse ni sérialisation du paquet
+
+        L'archive de base est recopiée telle quelle, puis chaque partie modifiée
+        y est ajoutée : ses fragments fixes joints aux valeurs échappées.
+
+        Returns:
+            (contenu du fichier .docx, liste des remplacements effectués si debug_mode)
+        """
+        buffer = io.BytesIO(self.base)
+        buffer.seek(0, io.SEEK_END)
+        with zipfile.ZipFile(buffer, 'a', compression=zipfile.ZIP_DEFLATED) as package:
+            for name, (pieces, keys) in self.parts.items():
+                values = [escape(str(replacements[key])).encode('utf-8') for key in keys]
+                xml = bytearray(pieces[0])
+                for value, piece in zip(values, pieces[1:]):
+                    xml += value
+                    xml += piece
+                package.writestr(name, bytes(xml))
+
+        replacements_made = []
+        if debug_mode:
+            replacements_made = [f"{label}: '{old_text}' → '{replacements[old_text]}'" for label, old_text in self.debug_info]
+        return buffer.getvalue(), replacements_made
+
+    def _compile_merge(self):
+        """
+        Prépare le document fusionné : corps du modèle découpé en une section répétable
+
+        Le XML du corps (entre <w:body> et le w:sectPr final) est la section d'un
+        employé ; le w:sectPr final, placé dans un paragraphe, en marque la fin
+        et le saut de page. Les en-têtes et pieds de page sans valeur à insérer
+        sont partagés par toutes les sections ; ceux qui en contiennent sont
+        dupliqués par employé.
+        """
+        name = 'word/document.xml'
+        with zipfile.ZipFile(io.BytesIO(self.base)) as package:
+            if name in self.parts:
+                pieces, keys = self.parts[name]
+            else:
+                pieces, keys = [package.read(name)], []
+            # Autres parties XML (en-têtes, pieds de page...) : leurs objets dessinés gardent leurs identifiants
+            others = [package.read(member) for member in package.namelist()
+                      if member.startswith('word/') and member.endswith('.xml') and member != name]
+        others += [piece for part, (part_pieces, _) in self.parts.items() if part != name for piece in part_pieces]
+        drawing_ids = [int(found) for xml in others for found in re.findall(rb'<wp:docPr id="(\d+)"', xml)]
+
+        body = re.search(rb'<w:body[^>]*>', pieces[0]).end()
+        sect_start = pieces[-1].rfind(b'<w:sectPr')
+        sect_end = pieces[-1].rfind(b'</w:body>')
+        if len(pieces) == 1:
+            head, section, tail = pieces[0][:body], [pieces[0][body:sect_start]], pieces[0][sect_start:]
+        else:
+            head, tail = pieces[0][:body], pieces[-1][sect_start:]
+            section = [pieces[0][body:]] + pieces[1:-1] + [pieces[-1][:sect_start]]
+        sect_pr, tail = tail[:sect_end - sect_start], tail[sect_end - sect_start:]
+
+        # Identifiants de paragraphe facultatifs, qui seraient répétés à chaque section
+        section = [re.sub(rb' w14:(?:paraId|textId)="[^"]*"', b'', piece) for piece in section]
+
+        # En-têtes / pieds de page à valeurs : une copie par employé, référencée par sa section
+        per_employee = {}
+        for r_id, rel in self.document.part.rels.items():
+            if not rel.is_external and rel.target_part.partname.lstrip('/') in self.parts:
+                per_employee[r_id] = rel
+        self.merge = {
+            'head': head, 'section': section, 'keys': keys, 'sect_pr': sect_pr, 'tail': tail,
+            'per_employee': per_employee, 'drawings': any(b'<wp:docPr ' in piece for piece in section),
+            'max_drawing_id': max(drawing_ids, default=0),
+        }
+
+    def write_merged(self, replacements_list, output, progress=None):
+        """
+        Écrit un seul .docx avec une section (une page) par jeu de remplacements
+
+        Le corps est écrit section par section dans le membre word/document.xml
+        de l'archive : le coût est linéaire en nombre d'employés et le document
+        n'est jamais reconstruit en mémoire. Les autres parties (logo, styles,
+        thème...) ne figurent qu'une fois.
+
+        Args:
+            replacements_list: Liste de dictionnaires de remplacements
+            output: Chemin ou fichier binaire du .docx
+            progress: Fonction appelée avec (sections écrites, total)
+        """
+        if self.merge is None:
+            self._compile_merge()
+        merge = self.merge
+        total = len(replacements_list)
+        per_employee = merge['per_employee']
+        rewritten = {'word/document.xml'}
+        if per_employee:
+            rewritten |= {'[Content_Types].xml', 'word/_rels/document.xml.rels'}
+            for rel in per_employee.values():
+                folder, filename = rel.target_part.partname.lstrip('/').rsplit('/', 1)
+                rewritten.add(f"{folder}/_rels/{filename}.rels")
+
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as package, \
+                zipfile.ZipFile(io.BytesIO(self.base)) as base:
+            # Copie des informations de membre : writestr les modifie (position dans l'archive)
+            members = set(base.namelist())
+            for info in base.infolist():
+                if info.filename not in rewritten:
+                    package.writestr(copy.copy(info), base.read(info))
+
+            # En-têtes / pieds de page propres à chaque employé, écrits avant le corps
+            overrides, relationships = [], []
+            for number, replacements in enumerate(replacements_list):
+                for r_id, rel in per_employee.items():
+                    name = rel.target_part.partname.lstrip('/')
+                    folder, filename = name.rsplit('/', 1)
+                    copy_name = f"{filename[:-4]}_{number + 1}.xml"
+                    pieces, keys = self.parts[name]
+                    part_xml = bytearray(pieces[0])
+                    for key, piece in zip(keys, pieces[1:]):
+                        part_xml += escape(str(replacements[key])).encode('utf-8')
+                        part_xml += piece
+                    package.writestr(f"{folder}/{copy_name}", bytes(part_xml))
+                    if f"{folder}/_rels/{filename}.rels" in members:
+                        package.writestr(f"{folder}/_rels/{copy_name}.rels", base.read(f"{folder}/_rels/{filename}.rels"))
+                    overrides.append(f'<Override PartName="/{folder}/{copy_name}" ContentType="{rel.target_part.content_type}"/>')
+                    relationships.append(f'<Relationship Id="{r_id}_{number + 1}" Type="{rel.reltype}" Target="{copy_name}"/>')
+            if per_employee:
+                # Les parties d'origine (non complétées) sont remplacées par leurs copies
+                content_types = base.read('[Content_Types].xml')
+                rels = base.read('word/_rels/document.xml.rels')
+                for r_id, rel in per_employee.items():
+                    content_types = re.sub(rb'<Override PartName="%s"[^>]*/>' % re.escape(str(rel.target_part.partname).encode()), b'', content_types)
+                    rels = re.sub(rb'<Relationship Id="%s"[^>]*/>' % re.escape(r_id.encode()), b'', rels)
+                package.writestr('[Content_Types].xml', content_types.replace(b'</Types>', ''.join(overrides).encode('utf-8') + b'</Types>'))
+                package.writestr('word/_rels/document.xml.rels', rels.replace(b'</Relationships>', ''.join(relationships).encode('utf-8') + b'</Relationships>'))
+
+            drawing_id = merge['max_drawing_id']
+
+            def renumber(match):
+                # Identifiants d'objets dessinés uniques dans tout le document, au-delà de ceux des en-têtes
+                nonlocal drawing_id
+                drawing_id += 1
+                return b'<wp:docPr id="%d"' % drawing_id
+
+            with package.open('word/document.xml', 'w', force_zip64=True) as xml:
+                xml.write(merge['head'])
+                for number, replacements in enumerate(replacements_list):
+                    values = [escape(str(replacements[key])).encode('utf-8') for key in merge['keys']]
+                    chunk = bytearray(merge['section'][0])
+                    for value, piece in zip(values, merge['section'][1:]):
+                        chunk += value
+                        chunk += piece
+                    if merge['drawings']:
+                        chunk = re.sub(rb'<wp:docPr id="\d+"', renumber, bytes(chunk))
+
+                    sect_pr = merge['sect_pr']
+                    for r_id in per_employee:
+                        sect_pr = sect_pr.replace(f'r:id="{r_id}"'.encode(), f'r:id="{r_id}_{number + 1}"'.encode())
+
+                    xml.write(chunk)
+                    if number < total - 1:
+                        xml.write(b'<w:p><w:pPr>' + sect_pr + b'</w:pPr></w:p>')
+                    else:
+                        xml.write(sect_pr)
+                    if progress is not None:
+                        progress(number + 1, total)
+                xml.write(merge['tail'])
+
+
+# Marqueur de valeur dans le XML compilé (caractères à usage privé, absents du modèle)
+_MARKER = re.compile(' \ue000(\\d+)\ue001 ')
+
+
+class _Markers(dict):
+    """Remplacements factices : chaque valeur demandée devient un marqueur numéroté"""
+
+    def __init__(self, marker):
+        super().__init__()
+        self.marker = marker
+
+    def __getitem__(self, key):
+        return self.marker(key)
+
+
+# Modèles compilés, par (chemin, textes à remplacer)
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+def load_template(path, placeholders):
+    """Modèle compilé en cache, recompilé si le fichier a été modifié (mtime)"""
+    key = (os.path.abspath(path), tuple(placeholders))
+    mtime_ns = os.stat(path).st_mtime_ns
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is not None and template.mtime_ns == mtime_ns:
+            return template
+    template = CompiledTemplate(path, placeholders)
+    with _templates_lock:
+        _templates[key] = template
+    return template
+
+
+def render_certificate(employee_data, template_path, custom_reference=None, debug_mode=False):
+    """
+    Attestation DOCX d'un employé
+
+    Returns:
+        (buffer mémoire du fichier .docx, liste des remplacements si debug_mode)
+    """
+    replacements = certificate_replacements(employee_data, custom_reference)
+    template = load_template(template_path, replacements)
+    content, replacements_made = template.render_bytes(replacements, debug_mode)
+    return io.BytesIO(content), replacements_made
+
+
+def certificate_filename(employee_data, today=None):
+    """Nom du fichier .docx d'une attestation"""
+    today = today or datetime.now()
+    filename = f"Attestation_{employee_data.get('Nom', 'Employe')}_{employee_data.get('Prenoms', '')}_{today.strftime('%Y%m%d')}.docx"
+    return filename.replace(' ', '_')
+
+
+def _render_chunk(employees, template_path):
+    """
+    Rend un lot d'attestations (exécuté dans un processus de travail)
+
+    Returns:
+        [(nom de fichier, contenu .docx ou None, message d'erreur ou None), ...]
+    """
+    results = []
+    for employee_data in employees:
+        filename = certificate_filename(employee_data)
+        try:
+            doc_buffer, _ = render_certificate(employee_data, template_path)
+            results.append((filename, doc_buffer.getvalue(), None))
+        except Exception as e:
+            results.append((filename, None, str(e)))
+    return results
+
+
+def render_batch(employees, template_path, output, workers=None, progress=None):
+    """
+    Génère les attestations d'une population dans une archive ZIP
+
+    Les lots de BATCH_CHUNK employés sont rendus en parallèle, et chaque lot
+    terminé est écrit aussitôt dans l'archive : seuls les lots en cours sont en
+    mémoire. Les noms de fichier en double reçoivent un suffixe.
+
+    Args:
+        employees: Liste de dictionnaires (une attestation par employé)
+        template_path: Chemin du modèle DOCX
+        output: Chemin ou fichier binaire de l'archive ZIP
+        workers: Nombre de processus (None = nombre de cœurs, 1 = sans processus)
+        progress: Fonction appelée avec (attestations traitées, total, secondes écoulées)
+
+    Returns:
+        Dictionnaire {'documents', 'errors' [(fichier, message)], 'seconds'}
+    """
+    chunks = [employees[start:start + BATCH_CHUNK] for start in range(0, len(employees), BATCH_CHUNK)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    started = time.perf_counter()
+    done, errors, names = 0, [], set()
+
+    # Archive non compressée : les .docx sont déjà des archives ZIP compressées
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+        def write(results):
+            nonlocal done
+            for filename, content, error in results:
+                done += 1
+                if content is None:
+                    errors.append((filename, error))
+                    continue
+                name, suffix = filename, 1
+                while name in names:
+                    suffix += 1
+                    name = filename.replace('.docx', f'_{suffix}.docx')
+                names.add(name)
+                archive.writestr(name, content)
+            if progress is not None:
+                progress(done, len(employees), time.perf_counter() - started)
+
+        if workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+                # Au plus deux lots en attente par processus
+                pending, queued = set(), iter(chunks)
+                for chunk in queued:
+                    pending.add(pool.submit(_render_chunk, chunk, template_path))
+                    if len(pending) >= 2 * workers:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            write(future.result())
+                for future in wait(pending).done:
+                    write(future.result())
+        else:
+            for chunk in chunks:
+                write(_render_chunk(chunk, template_path))
+
+    return {'documents': done - len(errors), 'errors': errors, 'seconds': time.perf_counter() - started}
+
+
+def render_merged(employees, template_path, output, progress=None):
+    """
+    Attestations d'une population dans un seul document prêt à imprimer
+
+    Le modèle est analysé une fois ; chaque employé occupe une section du
+    document, séparée de la suivante par un saut de page.
+
+    Args:
+        employees: Liste de dictionnaires (une attestation par employé)
+        template_path: Chemin du modèle DOCX
+        output: Chemin ou fichier binaire du .docx
+        progress: Fonction appelée avec (attestations écrites, total, secondes écoulées)
+
+    Returns:
+        Dictionnaire {'documents', 'errors' [(fichier, message)], 'seconds'}
+    """
+    started = time.perf_counter()
+    replacements_list, errors = [], []
+    for employee_data in employees:
+        try:
+            replacements_list.append(certificate_replacements(employee_data))
+        except Exception as e:
+            errors.append((certificate_filename(employee_data), str(e)))
+    if not replacements_list:
+        return {'documents': 0, 'errors': errors, 'seconds': time.perf_counter() - started}
+
+    template = load_template(template_path, replacements_list[0])
+    report = None
+    if progress is not None:
+        def report(done, total):
+            progress(done, total, time.perf_counter() - started)
+    template.write_merged(replacements_list, output, report)
+    return {'documents': len(replacements_list), 'errors': errors, 'seconds': time.perf_counter() - started}
@@ -0,0 +1,162 @@
+# Cache LRU des vues filtrées et des résultats calculés (KPIs, agrégats, graphiques)
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Propriétés d'une trace Plotly qui portent les données (le reste est de taille fixe)
+TRACE_DATA_PROPERTIES = ('x', 'y', 'z', 'values', 'labels', 'parents', 'ids', 'r', 'theta', 'lat', 'lon',
+                         'text', 'hovertext', 'customdata', 'marker.color', 'marker.size')
+
+# Taille forfaitaire (octets) d'une figure hors données : mise en page et propriétés des traces
+FIGURE_BASE_BYTES = 8 * 1024
+
+
+def normalize_filter_state(categories=None, ranges=None):
+    """
+    Forme canonique d'un état de filtres
+
+    Les filtres inactifs (None, liste vide) sont ignorés, les listes de valeurs
+    sont triées et les bornes converties en flottants : deux états équivalents
+    donnent la même forme, quel que soit l'ordre de sélection.
+    """
+    state = {'categories': {}, 'ranges': {}}
+
+    for column, values in (categories or {}).items():
+        if values is None:
+            continue
+        if isinstance(values, (list, tuple, set, frozenset)):
+            if not values:
+                continue
+            values = sorted(str(value) for value in values)
+        else:
+            values = [str(values)]
+        state['categories'][column] = values
+
+    for column, bounds in (ranges or {}).items():
+        if bounds is None:
+            continue
+        state['ranges'][column] = [None if bound is None else float(bound) for bound in bounds]
+
+    return state
+
+
+def filter_state_key(categories=None, ranges=None, namespace=None):
+    """Empreinte stable d'un état de filtres (clé de cache)"""
+    state = normalize_filter_state(categories, ranges)
+    if namespace is not None:
+        state['namespace'] = str(namespace)
+    payload = json.dumps(state, sort_keys=True, ensure_ascii=False)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def estimate_size(value, _seen=None):
+    """
+    Estimation (en octets) de l'empreinte mémoire d'une valeur mise en cache
+
+    - DataFrame / Series : mémoire réelle, chaînes des colonnes objet comprises ;
+    - figure Plotly : tableaux de données des traces (TRACE_DATA_PROPERTIES) plus
+      FIGURE_BASE_BYTES, sans sérialiser la figure ;
+    - objet composé (HeadcountTimeline, ...) : somme de ses attributs, chaque
+      objet n'étant compté qu'une fois.
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if hasattr(value, 'to_plotly_json') and hasattr(value, 'data'):
+        return FIGURE_BASE_BYTES + sum(estimate_size(trace[name], seen) for trace in value.data
+                                       for name in TRACE_DATA_PROPERTIES if name in trace)
+    if isinstance(value, dict):
+        return 64 * len(value) + sum(estimate_size(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return 8 * len(value) + sum(estimate_size(item, seen) for item in value)
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return sys.getsizeof(value) + estimate_size(vars(value), seen)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """
+    Cache LRU borné en nombre d'entrées et en mémoire estimée
+
+    Partagé entre les sessions Streamlit (accès protégé par un verrou), avec
+    compteurs de succès / échecs.
+    """
+
+    def __init__(self, max_entries=128, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Retourne la valeur en cache (et la marque comme récemment utilisée)"""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value, size=None):
+        """Ajoute une valeur, puis évince les entrées les plus anciennes si besoin"""
+        size = estimate_size(value) if size is None else size
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            # Une valeur plus grosse que le cache entier n'est pas conservée
+            if size > self.max_bytes:
+                return value
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute, size=None):
+        """Retourne la valeur en cache ou la calcule et la met en cache (size : taille connue, sinon estimée)"""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, compute(), size)
+        return value
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)"""
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        """Statistiques d'utilisation du cache"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups * 100 if lookups > 0 else 0,
+            }
@@ -0,0 +1,51 @@
+# Graphiques agrégés côté serveur (seuls les effectifs par classe sont envoyés au navigateur)
+import numpy as np
+import plotly.graph_objects as go
+
+
+def histogram_bins(values, nbins, weights=None):
+    """
+    Effectifs par classe de largeur égale (valeurs manquantes ignorées)
+
+    Les valeurs entières (âges) reçoivent des classes de largeur entière, pour
+    que chaque classe couvre le même nombre d'âges. Avec weights, chaque valeur
+    compte pour son poids (cellules d'un cube).
+
+    Returns:
+        (effectifs, bornes des classes) ; tableaux vides si aucune valeur
+    """
+    values = np.asarray(values, dtype='float64')
+    known = ~np.isnan(values)
+    values = values[known]
+    if weights is not None:
+        weights = np.asarray(weights, dtype='float64')[known]
+    if len(values) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    low, high = values.min(), values.max()
+    if np.array_equal(values, np.round(values)):
+        width = max(1.0, np.ceil((high - low) / nbins))
+        edges = low + width * np.arange(int((high - low) // width) + 2)
+    else:
+        edges = nbins
+    return np.histogram(values, bins=edges, weights=weights)
+
+
+def binned_histogram(values, nbins, weights=None, title=None, color=None, x_title=None, y_title='count'):
+    """
+    Histogramme précalculé : une barre par classe, taille indépendante de l'effectif
+
+    Remplace px.histogram, qui envoie chaque valeur au navigateur pour y être
+    regroupée.
+    """
+    counts, edges = histogram_bins(values, nbins, weights)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate='%{customdata[0]:.4~g} - %{customdata[1]:.4~g} : %{y}<extra></extra>',
+        marker_color=color
+    ))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title, bargap=0)
+    return fig
@@ -0,0 +1,201 @@
+# Cube pré-agrégé des effectifs RH (cellules dimensions x tranche d'âge x tranche d'ancienneté)
+import numpy as np
+import pandas as pd
+
+from index_rh import FilterIndex
+from kpi_rh import compute_kpis, group_codes, kpi_kernel
+
+# Dimensions catégorielles du cube
+CUBE_DIMENSIONS = ['Direction', 'Déparetement', 'Sexe', 'Type de contrat', 'CSP', 'Observation']
+
+# Mesures numériques : colonne -> (largeur des tranches servant d'axes, précision des valeurs)
+# (âge en années entières, ancienneté au dixième d'année : voir pipeline_rh)
+CUBE_VALUES = {'Age_calcule': (5, 1), 'Anciennete_calculee': (5, 0.1)}
+
+# Colonne des cellules portant la tranche d'une mesure (borne basse, NaN si non renseignée)
+CUBE_BAND_COLUMNS = {'Age_calcule': 'Tranche_Age', 'Anciennete_calculee': 'Tranche_Anciennete'}
+
+# Colonne d'effectif de chaque cellule
+CUBE_COUNT_COLUMN = 'Effectif'
+
+
+def value_bands(values, width):
+    """Borne basse de la tranche de largeur width de chaque valeur (NaN si non renseignée)"""
+    values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+    return np.floor(values / width) * width
+
+
+class HRCube:
+    """
+    Cube des effectifs construit une fois par chargement des données
+
+    Chaque cellule est une combinaison observée des dimensions, d'une tranche
+    d'âge et d'une tranche d'ancienneté (CUBE_VALUES), avec son effectif. Pour
+    chaque mesure, la cellule garde l'histogramme de ses valeurs dans sa tranche
+    à la précision de la mesure (5 âges, 50 dixièmes d'année) : moyennes,
+    médianes, effectifs par seuil et histogrammes s'en déduisent exactement,
+    sans relire les employés.
+
+    Les cellules s'utilisent comme un DataFrame d'employés pondéré par la colonne
+    CUBE_COUNT_COLUMN pour les dimensions et les tranches (rollup_counts,
+    tableaux croisés) ; les indicateurs passent par kpis() et kpi_table().
+    """
+
+    def __init__(self, df, dimensions=None, values=None):
+        """Agrège les employés en cellules, construit les histogrammes et indexe les cellules"""
+        self.dimensions = [col for col in (CUBE_DIMENSIONS if dimensions is None else dimensions) if col in df.columns]
+        self.values = [col for col in (CUBE_VALUES if values is None else values) if col in df.columns]
+        self.size = len(df)
+
+        # Rang de chaque valeur à la précision de sa mesure, tranche et position dans la tranche
+        keys = df[self.dimensions].copy()
+        steps = {}
+        for column in self.values:
+            width, precision = CUBE_VALUES[column]
+            values_ = df[column].to_numpy(dtype='float64', na_value=np.nan)
+            known = ~np.isnan(values_)
+            step = np.rint(np.where(known, values_, 0.0) / precision).astype(np.int64)
+            band = step // round(width / precision)
+            keys[CUBE_BAND_COLUMNS[column]] = np.where(known, band * width, np.nan)
+            steps[column] = (known, step)
+
+        grouped = keys.groupby(list(keys.columns), observed=True, dropna=False, sort=False)
+        cell_ids = grouped.ngroup().to_numpy()
+        self.cells = grouped.size().rename(CUBE_COUNT_COLUMN).reset_index()
+        n_cells = len(self.cells)
+
+        # Par mesure : histogramme de chaque cellule dans sa tranche, tranche (-1 si non
+        # renseignée) et valeurs extrêmes de la cellule
+        self.per_band, self.first_step, self.n_bands = {}, {}, {}
+        self.histograms, self.cell_bands, self.cell_bounds = {}, {}, {}
+        for column in self.values:
+            width, precision = CUBE_VALUES[column]
+            per_band = round(width / precision)
+            known, step = steps[column]
+            bands = np.full(n_cells, -1, dtype=np.int64)
+            bands[cell_ids[known]] = step[known] // per_band
+            first_band = bands[bands >= 0].min() if (bands >= 0).any() else 0
+
+            histograms = np.bincount(cell_ids[known] * per_band + step[known] % per_band,
+                                     minlength=n_cells * per_band).reshape(n_cells, per_band)
+            present = histograms > 0
+            first = present.argmax(axis=1)
+            last = per_band - 1 - present[:, ::-1].argmax(axis=1)
+            filled = bands >= 0
+            low = np.where(filled, np.round((bands * per_band + first) * precision, 6), np.nan)
+            high = np.where(filled, np.round((bands * per_band + last) * precision, 6), np.nan)
+
+            self.per_band[column] = per_band
+            self.first_step[column] = first_band * per_band
+            self.n_bands[column] = int(bands.max() - first_band + 1) if filled.any() else 0
+            self.histograms[column] = histograms
+            self.cell_bands[column] = np.where(filled, bands - first_band, -1)
+            self.cell_bounds[column] = (low, high)
+
+        self.index = FilterIndex(self.cells, category_columns=self.dimensions, range_columns=[])
+
+    def supports(self, categories=None, ranges=None):
+        """
+        Indique si une combinaison de filtres se résout sur les cellules du cube
+
+        Les filtres catégoriels doivent porter sur les dimensions ; une plage d'âge
+        ou d'ancienneté doit retenir chaque cellule entièrement ou pas du tout
+        (bornes alignées sur les valeurs extrêmes des cellules, plage complète...).
+        """
+        for column, values in (categories or {}).items():
+            if values is not None and column not in self.dimensions:
+                return False
+        for column, bounds in (ranges or {}).items():
+            if bounds is None:
+                continue
+            if column not in self.values:
+                return False
+            low, high = self._bounds(bounds)
+            cell_low, cell_high = self.cell_bounds[column]
+            with np.errstate(invalid='ignore'):
+                inside = (cell_low >= low) & (cell_high <= high)
+                outside = (cell_high < low) | (cell_low > high)
+            if not (inside | outside | np.isnan(cell_low)).all():
+                return False
+        return True
+
+    @staticmethod
+    def _bounds(bounds):
+        """Bornes d'une plage (None = illimitée)"""
+        low, high = bounds
+        return -np.inf if low is None else low, np.inf if high is None else high
+
+    def select(self, categories=None, ranges=None):
+        """Cellules retenues par les filtres (mêmes conventions que FilterIndex.filter), index = position"""
+        positions = self.index.select(categories)
+        mask = np.ones(len(self.cells), dtype=bool)
+        if positions is not None:
+            mask[:] = False
+            mask[positions] = True
+
+        for column, bounds in (ranges or {}).items():
+            if bounds is None or column not in self.values:
+                continue
+            low, high = self._bounds(bounds)
+            cell_low, cell_high = self.cell_bounds[column]
+            filled = ~np.isnan(cell_low)
+            # Plage complète sans valeur manquante : pas de filtre (comme FilterIndex)
+            if filled.all() and low <= cell_low.min() and high >= cell_high.max():
+                continue
+            with np.errstate(invalid='ignore'):
+                mask &= filled & (cell_low >= low) & (cell_high <= high)
+
+        return self.cells.take(np.flatnonzero(mask))
+
+    def distributions(self, cells, codes=None, n_groups=1, columns=None):
+        """
+        Histogrammes des mesures par groupe de cellules (format distributions de kpi_kernel)
+
+        Args:
+            cells: Cellules retenues (select), dont l'index est la position dans le cube
+            codes: Code de groupe de chaque cellule (-1 = ignorée) ; None = un seul groupe
+            n_groups: Nombre de groupes
+            columns: Mesures voulues (None = toutes)
+
+        Returns:
+            {colonne: (effectifs groupes x valeurs, valeurs croissantes)}
+        """
+        positions = cells.index.to_numpy()
+        codes = np.zeros(len(positions), dtype=np.intp) if codes is None else np.asarray(codes, dtype=np.intp)
+        result = {}
+        for column in (self.values if columns is None else columns):
+            per_band = self.per_band[column]
+            n_values = self.n_bands[column] * per_band
+            bands = self.cell_bands[column][positions]
+            kept = (codes >= 0) & (bands >= 0)
+            slots = (codes[kept] * n_values + bands[kept] * per_band)[:, None] + np.arange(per_band)
+            histogram = np.bincount(slots.ravel(), weights=self.histograms[column][positions[kept]].ravel(),
+                                    minlength=n_groups * n_values).reshape(n_groups, n_values)
+            precision = CUBE_VALUES[column][1]
+            values = np.round((self.first_step[column] + np.arange(n_values)) * precision, 6)
+            result[column] = (np.rint(histogram).astype(np.int64), values)
+        return result
+
+    def distribution(self, cells, column):
+        """Valeurs observées d'une mesure dans les cellules et leurs effectifs (histogrammes)"""
+        histogram, values = self.distributions(cells, columns=[column])[column]
+        present = histogram[0] > 0
+        return values[present], histogram[0][present]
+
+    def kpis(self, cells):
+        """Indicateurs RH des cellules retenues (même contenu que compute_kpis sur les employés)"""
+        return compute_kpis(cells, CUBE_COUNT_COLUMN, self.distributions(cells))
+
+    def kpi_table(self, cells, group_column):
+        """Indicateurs RH par modalité d'une dimension (même contenu que kpi_table sur les employés)"""
+        codes, groups = group_codes(cells[group_column])
+        kpis = kpi_kernel(cells, codes, len(groups), weights=cells[CUBE_COUNT_COLUMN].to_numpy(),
+                          distributions=self.distributions(cells, codes, len(groups)))
+        table = pd.DataFrame(kpis, index=pd.Index(groups, name=group_column))
+        return table[table['total_employees'] > 0]
+
+
+def rollup_counts(df, by, count_column=None):
+    """Effectifs par modalité(s) : une ligne par employé, ou cellules pondérées par count_column"""
+    grouped = df.groupby(by, observed=True)
+    return grouped.size() if count_column is None else grouped[count_column].sum()
@@ -8,6 +8,10 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import warnings
+from pipeline_rh import count_values, load_hr_data
+from charts_rh import binned_histogram
+from pyramid_rh import age_pyramid
+from kpi_rh import compute_kpis
 warnings.filterwarnings('ignore')
 
 # Configuration de la page Streamlit
@@ -84,75 +88,8 @@ st.markdown("""
 def load_and_clean_data():
     """Charge et nettoie les données RH du fichier CSV"""
     try:
-        # Chargement du fichier CSV avec le bon séparateur
-        df = pd.read_csv('Book1.csv', sep=';', encoding='latin-1')
-        
-        # Suppression des colonnes vides à la fin
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-        df = df.dropna(how='all', axis=1)
-        
-        # Nettoyage des colonnes vides supplémentaires
-        empty_cols = [col for col in df.columns if df[col].isna().all() or (df[col] == '').all()]
-        df = df.drop(columns=empty_cols)
-        
-        # Suppression des lignes vides
-        df = df.dropna(how='all')
-        
-        # Nettoyage des noms de colonnes
-        df.columns = df.columns.str.strip()
-        
-        # Conversion des dates
-        if 'Date de naissance' in df.columns:
-            df['Date de naissance'] = pd.to_datetime(df['Date de naissance'], format='%d/%m/%Y', errors='coerce')
-        
-        if 'DateEntree' in df.columns:
-            df['DateEntree'] = pd.to_datetime(df['DateEntree'], format='%d/%m/%Y', errors='coerce')
-        
-        # Calcul de l'âge actuel basé sur la date de naissance
-        if 'Date de naissance' in df.columns:
-            today = datetime.now()
-            df['Age_calcule'] = ((today - df['Date de naissance']).dt.days / 365.25).round().astype('Int64')
-        
-        # Calcul de l'ancienneté en années
-        if 'DateEntree' in df.columns:
-            df['Anciennete_calculee'] = ((datetime.now() - df['DateEntree']).dt.days / 365.25).round(1)
-        
-        # Nettoyage des espaces dans les colonnes textuelles
-        text_columns = ['Sexe', 'Situation Civile', 'Type de contrat', 'Direction', 'Déparetement', 'CSP']
-        for col in text_columns:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-        
-        # Standardisation des valeurs
-        if 'Sexe' in df.columns:
-            df['Sexe'] = df['Sexe'].map({'M': 'Masculin', 'F': 'Féminin'}).fillna(df['Sexe'])
-        
-        # Création de catégories d'analyse
-        if 'Age_calcule' in df.columns:
-            df['Generation'] = pd.cut(df['Age_calcule'], 
-                                    bins=[0, 30, 40, 50, 60, 100], 
-                                    labels=['Gen Z/Y', 'Millennials', 'Gen X', 'Baby Boomers', 'Seniors'])
-            
-            df['Statut_Retraite'] = df['Age_calcule'].apply(
-                lambda x: 'Proche retraite (55+)' if x >= 55 
-                else 'Mi-carrière (35-54)' if x >= 35 
-                else 'Jeune talent (<35)')
-        
-        if 'Anciennete_calculee' in df.columns:
-            df['Segment_Anciennete'] = pd.cut(df['Anciennete_calculee'], 
-                                            bins=[-1, 2, 5, 10, 20, 100], 
-                                            labels=['Nouveau (0-2 ans)', 'Junior (2-5 ans)', 
-                                                   'Expérimenté (5-10 ans)', 'Senior (10-20 ans)', 
-                                                   'Expert (20+ ans)'])
-        
-        # Calcul des indicateurs de risque
-        if 'Age_calcule' in df.columns and 'Anciennete_calculee' in df.columns:
-            df['Risque_Depart'] = df.apply(lambda row: 
-                'Élevé' if (row['Age_calcule'] >= 55 or row['Anciennete_calculee'] <= 1) 
-                else 'Moyen' if (row['Age_calcule'] >= 45 and row['Anciennete_calculee'] <= 3)
-                else 'Faible', axis=1)
-        
-        return df
+        # Pipeline commun : nettoyage, typage et colonnes calculées (snapshot disque partagé)
+        return load_hr_data('Book1.csv')
     
     except Exception as e:
         st.error(f"Erreur lors du chargement des données: {e}")
@@ -160,36 +97,8 @@ def load_and_clean_data():
 
 # Fonction pour créer des métriques avancées
 def create_advanced_metrics(df):
-    """Calcule des métriques RH avancées"""
-    metrics = {}
-    
-    if len(df) > 0:
-        # Calculs de base
-        metrics['total_employees'] = len(df)
-        metrics['avg_age'] = df['Age_calcule'].mean() if 'Age_calcule' in df.columns else 0
-        metrics['avg_tenure'] = df['Anciennete_calculee'].mean() if 'Anciennete_calculee' in df.columns else 0
-        
-        # Calculs avancés
-        if 'Sexe' in df.columns:
-            metrics['gender_ratio'] = (df['Sexe'] == 'Masculin').sum() / len(df) * 100
-            metrics['diversity_index'] = 1 - ((df['Sexe'] == 'Masculin').sum() / len(df))**2 - ((df['Sexe'] == 'Féminin').sum() / len(df))**2
-        
-        if 'Age_calcule' in df.columns:
-            metrics['retirement_risk'] = (df['Age_calcule'] >= 55).sum()
-            metrics['young_talent'] = (df['Age_calcule'] <= 35).sum()
-            metrics['median_age'] = df['Age_calcule'].median()
-        
-        if 'Anciennete_calculee' in df.columns:
-            metrics['turnover_risk'] = (df['Anciennete_calculee'] <= 2).sum()
-            metrics['experienced_staff'] = (df['Anciennete_calculee'] >= 10).sum()
-        
-        if 'Observation' in df.columns:
-            departures = df[df['Observation'].notna() & (df['Observation'] != '')]
-            metrics['turnover_rate'] = len(departures) / len(df) * 100 if len(df) > 0 else 0
-        else:
-            metrics['turnover_rate'] = 0
-    
-    return metrics
+    """Calcule des métriques RH avancées (noyau vectorisé en une passe)"""
+    return compute_kpis(df)
 
 # Fonction pour créer des graphiques avancés
 def create_advanced_visualizations(df):
@@ -241,12 +150,8 @@ def create_advanced_visualizations(df):
 def create_age_pyramid(df):
     """Crée une pyramide des âges par sexe"""
     if 'Age_calcule' in df.columns and 'Sexe' in df.columns:
-        # Créer des tranches d'âge
-        bins = range(20, 70, 5)
-        df['Tranche_age'] = pd.cut(df['Age_calcule'], bins=bins, right=False)
-        
-        # Compter par sexe et tranche d'âge
-        pyramid_data = df.groupby(['Tranche_age', 'Sexe']).size().unstack(fill_value=0)
+        # Compter par sexe et tranche d'âge de 5 ans (sans modifier df)
+        pyramid_data = age_pyramid(df)
         
         if 'Masculin' in pyramid_data.columns:
             pyramid_data['Masculin'] = -pyramid_data['Masculin']  # Valeurs négatives pour les hommes
@@ -527,7 +432,7 @@ def main():
         with col1:
             # Graphique en secteurs amélioré pour le sexe
             if 'Sexe' in filtered_df.columns:
-                sexe_counts = filtered_df['Sexe'].value_counts()
+                sexe_counts = count_values(filtered_df['Sexe'])
                 fig_sexe = px.pie(
                     values=sexe_counts.values, 
                     names=sexe_counts.index,
@@ -563,13 +468,8 @@ def main():
         with col2:
             # Pyramide des âges modernisée
             if 'Age_calcule' in filtered_df.columns and 'Sexe' in filtered_df.columns:
-                # Créer des tranches d'âge
-                bins = range(20, 70, 5)
-                filtered_df_temp = filtered_df.copy()
-                filtered_df_temp['Tranche_age'] = pd.cut(filtered_df_temp['Age_calcule'], bins=bins, right=False)
-                
-                # Compter par sexe et tranche d'âge
-                pyramid_data = filtered_df_temp.groupby(['Tranche_age', 'Sexe']).size().unstack(fill_value=0)
+                # Compter par sexe et tranche d'âge (un comptage, sans copie de la vue)
+                pyramid_data = age_pyramid(filtered_df)
                 
                 if len(pyramid_data) > 0:
                     fig_pyramid = go.Figure()
@@ -633,7 +533,7 @@ def main():
         
         with col2:
             if 'Statut_Retraite' in filtered_df.columns:
-                retraite_counts = filtered_df['Statut_Retraite'].value_counts()
+                retraite_counts = count_values(filtered_df['Statut_Retraite'])
                 fig_retraite = px.pie(
                     values=retraite_counts.values,
                     names=retraite_counts.index,
@@ -650,7 +550,7 @@ def main():
         with col1:
             # Top directions avec design amélioré
             if 'Direction' in filtered_df.columns:
-                direction_counts = filtered_df['Direction'].value_counts().head(10)
+                direction_counts = count_values(filtered_df['Direction']).head(10)
                 fig_direction = px.bar(
                     y=direction_counts.index,
                     x=direction_counts.values,
@@ -669,7 +569,7 @@ def main():
         with col2:
             # Types de contrat avec indicateurs
             if 'Type de contrat' in filtered_df.columns:
-                contrat_counts = filtered_df['Type de contrat'].value_counts()
+                contrat_counts = count_values(filtered_df['Type de contrat'])
                 fig_contrat = px.pie(
                     values=contrat_counts.values,
                     names=contrat_counts.index,
@@ -701,7 +601,7 @@ def main():
         
         with col1:
             if 'CSP' in filtered_df.columns:
-                csp_counts = filtered_df['CSP'].value_counts()
+                csp_counts = count_values(filtered_df['CSP'])
                 fig_csp = px.bar(
                     x=csp_counts.index,
                     y=csp_counts.values,
@@ -713,7 +613,7 @@ def main():
         
         with col2:
             if 'Situation Civile' in filtered_df.columns:
-                situation_counts = filtered_df['Situation Civile'].value_counts()
+                situation_counts = count_values(filtered_df['Situation Civile'])
                 fig_situation = px.pie(
                     values=situation_counts.values,
                     names=situation_counts.index,
@@ -731,12 +631,12 @@ def main():
         with col1:
             # Distribution des âges avec statistiques
             if 'Age_calcule' in filtered_df.columns:
-                fig_age = px.histogram(
-                    filtered_df,
-                    x='Age_calcule',
+                fig_age = binned_histogram(
+                    filtered_df['Age_calcule'],
                     nbins=25,
                     title="Distribution des Âges",
-                    color_discrete_sequence=['#3498db']
+                    color='#3498db',
+                    x_title='Age_calcule'
                 )
                 
                 # Ajouter les lignes de moyenne et médiane
@@ -757,7 +657,7 @@ def main():
         with col2:
             # Analyse des risques de départ
             if 'Risque_Depart' in filtered_df.columns:
-                risk_counts = filtered_df['Risque_Depart'].value_counts()
+                risk_counts = count_values(filtered_df['Risque_Depart'])
                 colors = {'Faible': '#2ecc71', 'Moyen': '#f39c12', 'Élevé': '#e74c3c'}
                 fig_risk = px.pie(
                     values=risk_counts.values,
@@ -849,7 +749,7 @@ def main():
             
             with col2:
                 # Analyse des raisons de départ
-                raisons_depart = departs['Observation'].value_counts()
+                raisons_depart = count_values(departs['Observation'])
                 fig_departs = px.pie(
                     values=raisons_depart.values,
                     names=raisons_depart.index,
@@ -861,12 +761,12 @@ def main():
             with col3:
                 # Profil des partants par âge
                 if 'Age_calcule' in departs.columns:
-                    fig_age_departs = px.histogram(
-                        departs,
-                        x='Age_calcule',
-                        title="Âge des Partants",
+                    fig_age_departs = binned_histogram(
+                        departs['Age_calcule'],
                         nbins=15,
-                        color_discrete_sequence=['#e74c3c']
+                        title="Âge des Partants",
+                        color='#e74c3c',
+                        x_title='Age_calcule'
                     )
                     st.plotly_chart(fig_age_departs, use_container_width=True, key="age_partants_histogram")
             
@@ -1039,7 +939,7 @@ def main():
             'Valeur': [
                 f"{filtered_df['Age_calcule'].mean():.1f} ans" if 'Age_calcule' in filtered_df.columns else "N/A",
                 f"{(filtered_df['CSP'].str.contains('Cadre|Manager|Directeur', case=False, na=False).sum() / len(filtered_df) * 100):.1f}%" if 'CSP' in filtered_df.columns else "N/A",
-                f"{(min(filtered_df['Sexe'].value_counts()) / max(filtered_df['Sexe'].value_counts()) * 100):.1f}%" if 'Sexe' in filtered_df.columns else "N/A",
+                f"{(min(count_values(filtered_df['Sexe'])) / max(count_values(filtered_df['Sexe'])) * 100):.1f}%" if 'Sexe' in filtered_df.columns else "N/A",
                 f"{filtered_df['Anciennete_calculee'].mean():.1f} ans" if 'Anciennete_calculee' in filtered_df.columns else "N/A",
                 f"{((filtered_df['Age_calcule'] >= 55).sum() / len(filtered_df) * 100):.1f}%" if 'Age_calcule' in filtered_df.columns else "N/A"
             ],
@@ -1064,7 +964,7 @@ def main():
                 'Indicateur': ['Stabilité Équipe', 'Diversité Genre', 'Maturité Org.', 'Renouvellement'],
                 'Score': [
                     f'{(filtered_df["Anciennete_calculee"] >= 5).sum() / len(filtered_df) * 100:.1f}%' if 'Anciennete_calculee' in filtered_df.columns else 'N/A',
-                    f'{(min(filtered_df["Sexe"].value_counts()) / max(filtered_df["Sexe"].value_counts()) * 100):.1f}%' if 'Sexe' in filtered_df.columns else 'N/A',
+                    f'{(min(count_values(filtered_df["Sexe"])) / max(count_values(filtered_df["Sexe"])) * 100):.1f}%' if 'Sexe' in filtered_df.columns else 'N/A',
                     f'{(filtered_df["CSP"].str.contains("Cadre|Manager", case=False, na=False).sum() / len(filtered_df) * 100):.1f}%' if 'CSP' in filtered_df.columns else 'N/A',
                     f'{(filtered_df["Age_calcule"] <= 35).sum() / len(filtered_df) * 100:.1f}%' if 'Age_calcule' in filtered_df.columns else 'N/A'
                 ],
@@ -1081,7 +981,7 @@ def main():
         
         # Graphique de répartition par direction (données réelles)
         if 'Direction' in filtered_df.columns:
-            direction_counts = filtered_df['Direction'].value_counts().head(8)
+            direction_counts = count_values(filtered_df['Direction']).head(8)
             
             fig_directions = px.bar(
                 x=direction_counts.values,
@@ -1139,7 +1039,7 @@ def main():
         st.subheader("Analyses par Département")
         
         if 'Déparetement' in filtered_df.columns:
-            dept_stats = filtered_df.groupby('Déparetement').agg({
+            dept_stats = filtered_df.groupby('Déparetement', observed=True).agg({
                 'Matricule': 'count',
                 'Age_calcule': ['mean', 'median'] if 'Age_calcule' in filtered_df.columns else 'count',
                 'Anciennete_calculee': ['mean', 'median'] if 'Anciennete_calculee' in filtered_df.columns else 'count'
@@ -1191,13 +1091,13 @@ def main():
         
         if x_axis in filtered_df.columns:
             if chart_type == 'Bar Chart':
-                counts = filtered_df[x_axis].value_counts()
+                counts = count_values(filtered_df[x_axis])
                 fig_custom = px.bar(x=counts.index, y=counts.values, 
                                   title=f"Répartition par {x_axis}")
                 st.plotly_chart(fig_custom, use_container_width=True, key="custom_bar_chart")
             
             elif chart_type == 'Pie Chart':
-                counts = filtered_df[x_axis].value_counts()
+                counts = count_values(filtered_df[x_axis])
                 fig_custom = px.pie(values=counts.values, names=counts.index,
                                   title=f"Répartition par {x_axis}")
                 st.plotly_chart(fig_custom, use_container_width=True, key="custom_pie_chart")
@@ -1,12 +1,10 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
+from datetime import datetime
 import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 import warnings
+from pipeline_rh import count_values, load_hr_data
+from charts_rh import binned_histogram
 warnings.filterwarnings('ignore')
 
 # Configuration de la page Streamlit
@@ -58,38 +56,8 @@ st.markdown("""
 def load_data():
     """Charge les données RH du fichier CSV"""
     try:
-        df = pd.read_csv('Book1.csv', sep=';', encoding='latin-1')
-        
-        # Nettoyage de base
-        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
-        df = df.dropna(how='all', axis=1)
-        empty_cols = [col for col in df.columns if df[col].isna().all() or (df[col] == '').all()]
-        df = df.drop(columns=empty_cols)
-        df = df.dropna(how='all')
-        df.columns = df.columns.str.strip()
-        
-        # Nettoyage des espaces
-        text_columns = ['Sexe', 'Situation Civile', 'Type de contrat', 'Direction', 'Déparetement', 'CSP', 'Poste', 'Unité']
-        for col in text_columns:
-            if col in df.columns:
-                df[col] = df[col].astype(str).str.strip()
-        
-        # Conversion des dates
-        if 'Date de naissance' in df.columns:
-            df['Date de naissance'] = pd.to_datetime(df['Date de naissance'], format='%d/%m/%Y', errors='coerce')
-        
-        if 'DateEntree' in df.columns:
-            df['DateEntree'] = pd.to_datetime(df['DateEntree'], format='%d/%m/%Y', errors='coerce')
-        
-        # Calculs d'âge et ancienneté
-        if 'Date de naissance' in df.columns:
-            today = datetime.now()
-            df['Age_calcule'] = ((today - df['Date de naissance']).dt.days / 365.25).round().astype('Int64')
-        
-        if 'DateEntree' in df.columns:
-            df['Anciennete_calculee'] = ((datetime.now() - df['DateEntree']).dt.days / 365.25).round(1)
-        
-        return df
+        # Pipeline commun : nettoyage, typage et colonnes calculées (snapshot disque partagé)
+        return load_hr_data('Book1.csv')
     
     except Exception as e:
         st.error(f"Erreur lors du chargement des données: {e}")
@@ -205,7 +173,7 @@ def main():
     with col1:
         # Répartition par sexe
         if 'Sexe' in filtered_df.columns:
-            sexe_counts = filtered_df['Sexe'].value_counts()
+            sexe_counts = count_values(filtered_df['Sexe'])
             fig_sexe = px.pie(
                 values=sexe_counts.values,
                 names=sexe_counts.index,
@@ -216,7 +184,7 @@ def main():
     with col2:
         # Répartition par département
         if 'Déparetement' in filtered_df.columns:
-            dept_counts = filtered_df['Déparetement'].value_counts().head(8)
+            dept_counts = count_values(filtered_df['Déparetement']).head(8)
             fig_dept = px.bar(
                 y=dept_counts.index,
                 x=dept_counts.values,
@@ -230,7 +198,7 @@ def main():
     with col1:
         # Répartition par direction
         if 'Direction' in filtered_df.columns:
-            direction_counts = filtered_df['Direction'].value_counts()
+            direction_counts = count_values(filtered_df['Direction'])
             fig_direction = px.bar(
                 x=direction_counts.index,
                 y=direction_counts.values,
@@ -242,7 +210,7 @@ def main():
     with col2:
         # Types de contrat
         if 'Type de contrat' in filtered_df.columns:
-            contrat_counts = filtered_df['Type de contrat'].value_counts()
+            contrat_counts = count_values(filtered_df['Type de contrat'])
             fig_contrat = px.pie(
                 values=contrat_counts.values,
                 names=contrat_counts.index,
@@ -253,11 +221,11 @@ def main():
     # Distribution des âges
     if 'Age_calcule' in filtered_df.columns:
         st.subheader("📊 Distribution des Âges")
-        fig_age = px.histogram(
-            filtered_df,
-            x='Age_calcule',
+        fig_age = binned_histogram(
+            filtered_df['Age_calcule'],
             nbins=20,
-            title="Distribution des Âges"
+            title="Distribution des Âges",
+            x_title='Age_calcule'
         )
         st.plotly_chart(fig_age, use_container_width=True)
         
@@ -280,7 +248,7 @@ def main():
             
             with col1:
                 # Raisons de départ
-                raisons = departs['Observation'].value_counts()
+                raisons = count_values(departs['Observation'])
                 fig_raisons = px.pie(
                     values=raisons.values,
                     names=raisons.index,
@@ -291,11 +259,11 @@ def main():
             with col2:
                 # Âge des partants
                 if 'Age_calcule' in departs.columns:
-                    fig_age_departs = px.histogram(
-                        departs,
-                        x='Age_calcule',
+                    fig_age_departs = binned_histogram(
+                        departs['Age_calcule'],
+                        nbins=10,
                         title="Âge des Partants",
-                        nbins=10
+                        x_title='Age_calcule'
                     )
                     st.plotly_chart(fig_age_departs, use_container_width=True)
     
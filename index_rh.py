@@ -0,0 +1,137 @@
+# Index de filtrage des données RH (bitmaps par modalité, plages par recherche dichotomique)
+import numpy as np
+import pandas as pd
+
+# Colonnes indexées par défaut
+CATEGORY_COLUMNS = ['Direction', 'Déparetement', 'Sexe', 'Type de contrat', 'CSP', 'Unité', 'Affectation']
+RANGE_COLUMNS = ['Age_calcule', 'Anciennete_calculee']
+
+
+class FilterIndex:
+    """
+    Index de filtrage construit une fois par chargement des données
+
+    - une bitmap (tableau booléen) par modalité des colonnes catégorielles ;
+    - pour les colonnes numériques, les positions triées par valeur, ce qui
+      ramène un filtre de plage à deux recherches dichotomiques.
+
+    Une combinaison de filtres se résout en intersection de bitmaps, puis en
+    positions de lignes : le DataFrame complet n'est jamais copié.
+    """
+
+    def __init__(self, df, category_columns=None, range_columns=None):
+        """Construit les bitmaps et les tableaux triés"""
+        self.df = df
+        self.size = len(df)
+        self.codes = {}
+        self.categories = {}
+        self.category_codes = {}
+        self.bitmaps = {}
+        self.sorted_positions = {}
+        self.sorted_values = {}
+
+        for col in (CATEGORY_COLUMNS if category_columns is None else category_columns):
+            if col not in df.columns:
+                continue
+            series = df[col]
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype('category')
+            codes = series.cat.codes.to_numpy()
+            categories = list(series.cat.categories)
+            self.codes[col] = codes
+            self.categories[col] = categories
+            self.category_codes[col] = {value: code for code, value in enumerate(categories)}
+            self.bitmaps[col] = {value: codes == code for code, value in enumerate(categories)}
+
+        for col in (RANGE_COLUMNS if range_columns is None else range_columns):
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy(dtype='float64', na_value=np.nan)
+            order = np.argsort(values, kind='stable')
+            self.sorted_positions[col] = order
+            self.sorted_values[col] = values[order]
+
+    def category_mask(self, column, values):
+        """Bitmap des lignes dont la colonne prend l'une des valeurs données"""
+        if isinstance(values, (list, tuple, set, frozenset)):
+            values = list(values)
+        else:
+            values = [values]
+
+        bitmaps = self.bitmaps[column]
+        if len(values) == 1:
+            bitmap = bitmaps.get(values[0])
+            return bitmap if bitmap is not None else np.zeros(self.size, dtype=bool)
+
+        # Plusieurs valeurs : table de correspondance code -> booléen
+        # (la dernière case correspond au code -1 des valeurs manquantes)
+        category_codes = self.category_codes[column]
+        lookup = np.zeros(len(category_codes) + 1, dtype=bool)
+        lookup[[category_codes[value] for value in values if value in category_codes]] = True
+        return lookup[self.codes[column]]
+
+    def range_positions(self, column, low=None, high=None):
+        """Positions des lignes dont la valeur est dans [low, high] (bornes incluses)"""
+        sorted_values = self.sorted_values[column]
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side='left')
+        if high is None:
+            # Les valeurs manquantes sont triées en fin de tableau
+            stop = len(sorted_values) - int(np.isnan(sorted_values).sum())
+        else:
+            stop = np.searchsorted(sorted_values, high, side='right')
+        return self.sorted_positions[column][start:stop]
+
+    def covers_all(self, column, low=None, high=None):
+        """Indique si la plage retient toutes les lignes (aucune valeur manquante)"""
+        sorted_values = self.sorted_values[column]
+        if len(sorted_values) == 0 or np.isnan(sorted_values[-1]):
+            return len(sorted_values) == 0
+        return (low is None or low <= sorted_values[0]) and (high is None or high >= sorted_values[-1])
+
+    def range_mask(self, column, low=None, high=None):
+        """Bitmap des lignes dont la valeur est dans [low, high]"""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.range_positions(column, low, high)] = True
+        return mask
+
+    def select(self, categories=None, ranges=None):
+        """
+        Résout une combinaison de filtres en positions de lignes
+
+        Args:
+            categories: {colonne: valeur ou liste de valeurs} (None = pas de filtre)
+            ranges: {colonne: (min, max)} (None = pas de filtre)
+
+        Returns:
+            Tableau trié des positions, ou None si aucun filtre n'est actif
+        """
+        mask = None
+
+        for column, values in (categories or {}).items():
+            if values is None or column not in self.bitmaps:
+                continue
+            column_mask = self.category_mask(column, values)
+            mask = column_mask if mask is None else mask & column_mask
+
+        for column, bounds in (ranges or {}).items():
+            if bounds is None or column not in self.sorted_values:
+                continue
+            low, high = bounds
+            if self.covers_all(column, low, high):
+                continue
+            column_mask = self.range_mask(column, low, high)
+            mask = column_mask if mask is None else mask & column_mask
+
+        if mask is None:
+            return None
+        return np.flatnonzero(mask)
+
+    def view(self, positions):
+        """DataFrame des lignes sélectionnées (le DataFrame complet si aucun filtre)"""
+        if positions is None:
+            return self.df
+        return self.df.take(positions)
+
+    def filter(self, categories=None, ranges=None):
+        """Raccourci : select() puis view()"""
+        return self.view(self.select(categories, ranges))
@@ -0,0 +1,309 @@
+# File de travaux en arrière-plan : attestations en lot, exports et rapports
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import pandas as pd
+
+from attestation_rh import render_batch, render_merged
+from kpi_rh import compute_kpis, kpi_table
+from pyramid_rh import age_pyramid
+
+# Dossier des résultats : un sous-dossier par travail (état + fichier produit)
+RESULTS_DIR = 'resultats_rh'
+
+# Nombre de travaux exécutés simultanément
+JOB_WORKERS = 2
+
+# Processus de rendu d'un lot d'attestations (archive ZIP) : les cœurs sont partagés
+# entre les JOB_WORKERS travaux simultanés, le processus du travail ne fait qu'écrire l'archive
+CERTIFICATE_WORKERS = max(1, (os.cpu_count() or 1) // JOB_WORKERS)
+
+# Intervalle minimal (secondes) entre deux enregistrements de l'avancement
+PROGRESS_INTERVAL = 0.5
+
+# Intervalle (secondes) entre deux signaux de vie d'un travail en cours
+HEARTBEAT_INTERVAL = 5
+
+# Délai (secondes) sans signal de vie au-delà duquel un travail en cours est considéré interrompu
+HEARTBEAT_TIMEOUT = 30
+
+# Durée de conservation (jours) des dossiers de travaux terminés, quel que soit leur propriétaire
+RESULTS_MAX_AGE_DAYS = 7
+
+# Lignes écrites par bloc lors d'un export CSV
+EXPORT_CHUNK = 10000
+
+# Statuts d'un travail
+PENDING, RUNNING, DONE, FAILED, INTERRUPTED = 'en attente', 'en cours', 'terminé', 'erreur', 'interrompu'
+
+STATE_FILE = 'etat.json'
+
+
+def _read_state(job_dir):
+    """État d'un travail (None si illisible)"""
+    try:
+        with open(os.path.join(job_dir, STATE_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_state(job_dir, state):
+    """Enregistre l'état d'un travail (remplacement atomique du fichier)"""
+    path = os.path.join(job_dir, STATE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, default=str)
+    os.replace(path + '.tmp', path)
+
+
+def _process_alive(pid):
+    """Indique si un processus existe encore sur cette machine"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def _is_interrupted(state):
+    """
+    Travail en attente ou en cours dont plus aucun processus ne s'occupe
+
+    - en cours : pas de signal de vie depuis HEARTBEAT_TIMEOUT secondes ;
+    - en attente : le processus du serveur qui l'a soumis n'existe plus.
+    """
+    if state['status'] == RUNNING:
+        return time.time() - (state.get('heartbeat') or 0) > HEARTBEAT_TIMEOUT
+    if state['status'] == PENDING:
+        return not state.get('pid') or not _process_alive(state['pid'])
+    return False
+
+
+def _certificates_zip(job_dir, progress, employees, template_path):
+    """Attestations d'une population, un fichier par employé dans une archive ZIP (rendu en parallèle)"""
+    result = render_batch(employees, template_path, os.path.join(job_dir, 'Attestations.zip'),
+                          workers=CERTIFICATE_WORKERS, progress=progress)
+    return 'Attestations.zip', result
+
+
+def _certificates_docx(job_dir, progress, employees, template_path):
+    """Attestations d'une population dans un seul document à imprimer"""
+    result = render_merged(employees, template_path, os.path.join(job_dir, 'Attestations.docx'), progress=progress)
+    return 'Attestations.docx', result
+
+
+def _export_csv(job_dir, progress, df):
+    """Export CSV d'une vue, écrit par blocs de EXPORT_CHUNK lignes"""
+    path = os.path.join(job_dir, 'export_rh.csv')
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, max(len(df), 1), EXPORT_CHUNK):
+            df.iloc[start:start + EXPORT_CHUNK].to_csv(f, index=False, header=start == 0)
+            progress(min(start + EXPORT_CHUNK, len(df)), len(df))
+    return 'export_rh.csv', {'rows': len(df)}
+
+
+def _report_html(job_dir, progress, df):
+    """Rapport HTML : indicateurs clés, indicateurs par Direction et CSP, pyramide des âges"""
+    sections = []
+    kpis = compute_kpis(df)
+    sections.append(('Indicateurs clés', pd.Series(kpis, name='Valeur').to_frame().to_html(float_format='%.1f')))
+    progress(1, 4)
+    for column in ['Direction', 'CSP']:
+        if column in df.columns:
+            sections.append((f'Indicateurs par {column}', kpi_table(df, column).to_html(float_format='%.1f')))
+        progress(len(sections), 4)
+    if 'Age_calcule' in df.columns and 'Sexe' in df.columns:
+        sections.append(('Pyramide des âges', age_pyramid(df).to_html()))
+    progress(4, 4)
+
+    body = ''.join(f'<h2>{title}</h2>{table}' for title, table in sections)
+    with open(os.path.join(job_dir, 'rapport_rh.html'), 'w', encoding='utf-8') as f:
+        f.write(f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Rapport RH</title></head><body>"
+                f"<h1>Rapport RH du {datetime.now().strftime('%d/%m/%Y %H:%M')}</h1>"
+                f"<p>{len(df)} employés</p>{body}</body></html>")
+    return 'rapport_rh.html', {'rows': len(df)}
+
+
+# Types de travaux : nom -> fonction (dossier du travail, fonction d'avancement, arguments...)
+JOB_TYPES = {
+    'attestations_zip': _certificates_zip,
+    'attestations_docx': _certificates_docx,
+    'export_csv': _export_csv,
+    'rapport': _report_html,
+}
+
+
+def _run_job(job_dir, kind, args):
+    """
+    Exécute un travail dans un processus de travail et enregistre son état
+
+    L'état porte le pid du processus et un signal de vie (heartbeat) rafraîchi
+    toutes les HEARTBEAT_INTERVAL secondes par un fil dédié, même pendant une
+    étape sans avancement.
+    """
+    state = _read_state(job_dir)
+    state.update(status=RUNNING, started=datetime.now().isoformat(timespec='seconds'),
+                 pid=os.getpid(), heartbeat=time.time())
+    _write_state(job_dir, state)
+    lock = threading.Lock()
+    stopped = threading.Event()
+    last_write = 0.0
+
+    def save():
+        with lock:
+            state['heartbeat'] = time.time()
+            _write_state(job_dir, state)
+
+    def heartbeat():
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            save()
+
+    def progress(done, total, seconds=None):
+        nonlocal last_write
+        with lock:
+            state.update(done=done, total=total)
+            if seconds:
+                state['rate'] = done / seconds
+        now = time.monotonic()
+        if now - last_write >= PROGRESS_INTERVAL or done == total:
+            last_write = now
+            save()
+
+    beating = threading.Thread(target=heartbeat, daemon=True)
+    beating.start()
+    try:
+        artifact, summary = JOB_TYPES[kind](job_dir, progress, *args)
+        result = dict(status=DONE, artifact=artifact, summary=summary)
+    except Exception as e:
+        result = dict(status=FAILED, error=str(e))
+    finally:
+        stopped.set()
+        beating.join()
+    state.update(result, finished=datetime.now().isoformat(timespec='seconds'))
+    save()
+
+
+class JobQueue:
+    """
+    File de travaux exécutés par un groupe de processus
+
+    Chaque travail reçoit un dossier dans RESULTS_DIR, avec son état (statut,
+    propriétaire, avancement, résumé) et le fichier produit. L'état étant sur
+    disque, la liste survit aux réexécutions du script, aux redémarrages et
+    se partage entre plusieurs processus serveur : les travaux terminés
+    restent disponibles, et seuls ceux dont le signal de vie s'est arrêté
+    sont marqués interrompus. Chaque utilisateur ne voit que ses travaux ;
+    les dossiers des travaux finis sont supprimés après RESULTS_MAX_AGE_DAYS
+    jours, y compris ceux qu'aucun propriétaire ne consulte plus.
+    """
+
+    def __init__(self, results_dir=RESULTS_DIR, workers=JOB_WORKERS):
+        """Crée le dossier des résultats et le groupe de processus"""
+        self.results_dir = results_dir
+        self.workers = workers
+        os.makedirs(results_dir, exist_ok=True)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.futures = {}
+        self.lock = threading.Lock()
+        self.prune_expired()
+
+    def submit(self, kind, label, *args, owner=None):
+        """
+        Ajoute un travail à la file
+
+        Args:
+            kind: Type de travail (clé de JOB_TYPES)
+            label: Libellé affiché
+            *args: Arguments du travail (transmis au processus de travail)
+            owner: Propriétaire (session ou utilisateur), seul à voir le travail
+
+        Returns:
+            Identifiant du travail
+        """
+        if kind not in JOB_TYPES:
+            raise ValueError(f"Type de travail inconnu : {kind}")
+        self.prune_expired()
+        job_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        job_dir = os.path.join(self.results_dir, job_id)
+        os.makedirs(job_dir)
+        _write_state(job_dir, {
+            'id': job_id, 'kind': kind, 'label': label, 'owner': owner, 'status': PENDING, 'pid': os.getpid(),
+            'heartbeat': None, 'created': datetime.now().isoformat(timespec='seconds'), 'started': None, 'finished': None,
+            'done': 0, 'total': None, 'rate': None, 'artifact': None, 'summary': None, 'error': None,
+        })
+
+        with self.lock:
+            try:
+                future = self.pool.submit(_run_job, job_dir, kind, args)
+            except BrokenProcessPool:
+                # Un processus de travail s'est arrêté brutalement : nouveau groupe
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+                future = self.pool.submit(_run_job, job_dir, kind, args)
+            self.futures[job_id] = future
+        future.add_done_callback(lambda future: self._check(job_id, job_dir, future))
+        return job_id
+
+    def _check(self, job_id, job_dir, future):
+        """Marque en erreur un travail dont le processus n'a pas pu enregistrer la fin"""
+        with self.lock:
+            self.futures.pop(job_id, None)
+        error = future.exception()
+        state = _read_state(job_dir)
+        if error is not None and state is not None and state['status'] in (PENDING, RUNNING):
+            state.update(status=FAILED, error=str(error) or type(error).__name__,
+                         finished=datetime.now().isoformat(timespec='seconds'))
+            _write_state(job_dir, state)
+
+    def jobs(self, owner):
+        """États des travaux d'un propriétaire, du plus récent au plus ancien"""
+        states = []
+        for job_id in sorted(os.listdir(self.results_dir), reverse=True):
+            state = _read_state(os.path.join(self.results_dir, job_id))
+            if state is None or state.get('owner') != owner:
+                continue
+            if _is_interrupted(state):
+                state['status'] = INTERRUPTED
+            states.append(state)
+        return states
+
+    def artifact_path(self, state):
+        """Chemin du fichier produit par un travail terminé"""
+        return os.path.join(self.results_dir, state['id'], state['artifact'])
+
+    def prune_expired(self, max_age_days=RESULTS_MAX_AGE_DAYS):
+        """
+        Supprime les dossiers des travaux finis (terminés, en erreur ou interrompus)
+        sans activité depuis plus de max_age_days jours, quel que soit leur propriétaire
+
+        L'activité est la date de modification du dossier (dernier état enregistré).
+        """
+        limit = time.time() - max_age_days * 86400
+        removed = 0
+        for job_id in os.listdir(self.results_dir):
+            job_dir = os.path.join(self.results_dir, job_id)
+            if not os.path.isdir(job_dir) or os.path.getmtime(job_dir) >= limit:
+                continue
+            state = _read_state(job_dir)
+            if state is not None and state['status'] in (PENDING, RUNNING) and not _is_interrupted(state):
+                continue
+            shutil.rmtree(job_dir, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def clear_finished(self, owner):
+        """Supprime les dossiers des travaux terminés, en erreur ou interrompus d'un propriétaire"""
+        removed = 0
+        for state in self.jobs(owner):
+            if state['status'] not in (PENDING, RUNNING):
+                shutil.rmtree(os.path.join(self.results_dir, state['id']), ignore_errors=True)
+                removed += 1
+        return removed
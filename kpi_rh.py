@@ -0,0 +1,251 @@
+# Noyau vectorisé des indicateurs RH (un seul passage sur les colonnes, sans DataFrame intermédiaire)
+import numpy as np
+import pandas as pd
+
+# Seuils des indicateurs
+RETIREMENT_AGE = 55
+YOUNG_TALENT_AGE = 35
+NEW_HIRE_TENURE = 2
+EXPERIENCED_TENURE = 10
+
+# Indicateurs tirés des mesures numériques : colonne -> (moyenne, médiane, [(indicateur, seuil, au moins le seuil)])
+VALUE_KPIS = {
+    'Age_calcule': ('avg_age', 'median_age',
+                    [('retirement_risk', RETIREMENT_AGE, True), ('young_talent', YOUNG_TALENT_AGE, False)]),
+    'Anciennete_calculee': ('avg_tenure', 'median_tenure',
+                            [('turnover_risk', NEW_HIRE_TENURE, False), ('experienced_staff', EXPERIENCED_TENURE, True)]),
+}
+
+
+def _float_values(df, column):
+    """Valeurs numériques d'une colonne en float64 (NaN pour les manquants), None si absente"""
+    if column not in df.columns:
+        return None
+    return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _equals(df, column, value):
+    """Masque des lignes égales à une valeur (via les codes si la colonne est catégorielle)"""
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if value not in categories:
+            return np.zeros(len(series), dtype=bool)
+        return series.cat.codes.to_numpy() == categories.get_loc(value)
+    return (series == value).to_numpy(dtype=bool, na_value=False)
+
+
+def departure_flags(df):
+    """Masque des employés ayant une observation de départ renseignée"""
+    series = df['Observation']
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Une case par modalité, la dernière pour le code -1 (valeur manquante)
+        lookup = np.append(series.cat.categories.astype(str) != '', False)
+        return lookup[series.cat.codes.to_numpy()]
+    return (series.notna() & (series != '')).to_numpy(dtype=bool, na_value=False)
+
+
+# Taille maximale (groupes x valeurs distinctes) du calcul des médianes par histogramme
+MEDIAN_HISTOGRAM_LIMIT = 4_000_000
+
+
+def histogram_medians(histogram, sorted_values):
+    """
+    Médiane par groupe lue sur un histogramme (groupes x valeurs croissantes)
+
+    Moyenne des valeurs de rang (n-1)//2 et n//2 de chaque groupe, NaN pour un
+    groupe vide : le même résultat qu'un tri des valeurs du groupe.
+    """
+    medians = np.full(len(histogram), np.nan)
+    if histogram.shape[1] == 0:
+        return medians
+    cumulative = histogram.cumsum(axis=1)
+    counts = cumulative[:, -1]
+    present = counts > 0
+    cumulative = cumulative[present]
+    low = (cumulative <= ((counts[present] - 1) // 2)[:, None]).sum(axis=1)
+    high = (cumulative <= (counts[present] // 2)[:, None]).sum(axis=1)
+    medians[present] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+
+def _group_medians(codes, values, n_groups, weights=None):
+    """
+    Médiane par groupe des valeurs renseignées (pondérées par weights si fourni)
+
+    Âges et anciennetés prennent peu de valeurs distinctes : les médianes se
+    lisent sur l'histogramme cumulé groupe x valeur (sans tri des lignes). Au-delà
+    de MEDIAN_HISTOGRAM_LIMIT, un tri unique sert à tous les groupes.
+    """
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    if weights is not None:
+        weights = weights[valid]
+    medians = np.full(n_groups, np.nan)
+
+    if n_groups == 1 and weights is None:
+        if len(values) > 0:
+            medians[0] = np.median(values)
+        return medians
+
+    value_codes, uniques = pd.factorize(values)
+    if n_groups * len(uniques) <= MEDIAN_HISTOGRAM_LIMIT:
+        order = np.argsort(uniques)
+        ranks = np.empty_like(order)
+        ranks[order] = np.arange(len(order))
+        histogram = np.bincount(codes * len(uniques) + ranks[value_codes], weights=weights,
+                                minlength=n_groups * len(uniques)).reshape(n_groups, len(uniques))
+        return histogram_medians(histogram, uniques[order])
+
+    # Tri unique (groupe, valeur), puis effectifs cumulés sur l'ensemble trié
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    sorted_weights = np.ones(len(order)) if weights is None else weights[order]
+    running = np.cumsum(sorted_weights)
+    counts = np.bincount(codes, weights=weights, minlength=n_groups)
+    offsets = np.cumsum(counts) - counts
+    present = counts > 0
+    # Rang de la valeur en position (n-1)//2 et n//2 dans chaque groupe trié
+    low = np.searchsorted(running, offsets[present] + (counts[present] - 1) // 2, side='right')
+    high = np.searchsorted(running, offsets[present] + counts[present] // 2, side='right')
+    medians[present] = (sorted_values[low] + sorted_values[high]) / 2
+    return medians
+
+
+def kpi_kernel(df, codes=None, n_groups=1, weights=None, distributions=None):
+    """
+    Calcule tous les indicateurs en une passe, pour un ou plusieurs groupes
+
+    Args:
+        df: DataFrame RH
+        codes: Code de groupe de chaque ligne (0..n_groups-1, -1 = ligne ignorée) ;
+            None = un seul groupe
+        n_groups: Nombre de groupes
+        weights: Effectif représenté par chaque ligne (cellules d'un cube) ;
+            None = une ligne par employé
+        distributions: {colonne de VALUE_KPIS: (effectifs groupes x valeurs, valeurs
+            croissantes)} pour les mesures absentes de df (histogrammes d'un cube)
+
+    Returns:
+        Dictionnaire {indicateur: tableau de n_groups valeurs}
+    """
+    kept = None
+    if codes is None:
+        codes = np.zeros(len(df), dtype=np.intp)
+    else:
+        codes = np.asarray(codes, dtype=np.intp)
+        if (codes < 0).any():
+            kept = codes >= 0
+            codes = codes[kept]
+
+    def rows(values):
+        return values if kept is None else values[kept]
+
+    if weights is not None:
+        weights = rows(np.asarray(weights, dtype='float64'))
+
+    if n_groups == 1 and kept is None:
+        # Un seul groupe : simples réductions, sans passer par les codes
+        if weights is None:
+            def count(mask):
+                return np.array([np.count_nonzero(mask)])
+
+            def total(values):
+                return np.array([values.sum()])
+        else:
+            def count(mask):
+                return np.array([int(weights[mask].sum())])
+
+            def total(values):
+                return np.array([np.dot(values, weights)])
+    else:
+        def count(mask):
+            mask_weights = mask if weights is None else np.where(mask, weights, 0.0)
+            return np.bincount(codes, weights=mask_weights, minlength=n_groups).astype(np.int64)
+
+        def total(values):
+            values_weights = values if weights is None else values * weights
+            return np.bincount(codes, weights=values_weights, minlength=n_groups)
+
+    totals = count(np.ones(len(codes), dtype=bool))
+    kpis = {'total_employees': totals}
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for column, (mean_name, median_name, thresholds) in VALUE_KPIS.items():
+            if distributions and column in distributions:
+                # Histogramme par groupe : sommes, médianes et seuils lus sur les classes
+                histogram, values = distributions[column]
+                kpis[mean_name] = histogram @ values / histogram.sum(axis=1)
+                kpis[median_name] = histogram_medians(histogram, values)
+                for name, threshold, at_least in thresholds:
+                    kpis[name] = histogram[:, values >= threshold if at_least else values <= threshold].sum(axis=1)
+                continue
+
+            values = _float_values(df, column)
+            if values is None:
+                continue
+            values = rows(values)
+            known = ~np.isnan(values)
+            kpis[mean_name] = total(np.where(known, values, 0.0)) / count(known)
+            kpis[median_name] = _group_medians(codes, values, n_groups, weights)
+            for name, threshold, at_least in thresholds:
+                kpis[name] = count(values >= threshold if at_least else values <= threshold)
+
+        if 'Sexe' in df.columns:
+            male_share = count(rows(_equals(df, 'Sexe', 'Masculin'))) / totals
+            female_share = count(rows(_equals(df, 'Sexe', 'Féminin'))) / totals
+            kpis['gender_ratio'] = male_share * 100
+            kpis['diversity_index'] = 1 - male_share ** 2 - female_share ** 2
+
+        if 'Observation' in df.columns:
+            kpis['turnover_rate'] = count(rows(departure_flags(df))) / totals * 100
+        else:
+            kpis['turnover_rate'] = np.zeros(n_groups)
+
+    return kpis
+
+
+def _weights(df, count_column):
+    """Poids des lignes : colonne d'effectif d'un cube, ou None (une ligne par employé)"""
+    return None if count_column is None else df[count_column].to_numpy()
+
+
+def compute_kpis(df, count_column=None, distributions=None):
+    """
+    Indicateurs RH de l'ensemble du DataFrame (dictionnaire vide si aucune ligne)
+
+    Même contenu que l'ancien calcul colonne par colonne : effectif, âges et
+    anciennetés moyens et médians, ratio et indice de diversité, effectifs par
+    seuil et taux de départ. Avec count_column, chaque ligne est une cellule de
+    cube représentant df[count_column] employés ; distributions (un seul groupe)
+    fournit alors l'âge et l'ancienneté (voir kpi_kernel).
+    """
+    if len(df) == 0:
+        return {}
+
+    kpis = {name: values[0] for name, values
+            in kpi_kernel(df, weights=_weights(df, count_column), distributions=distributions).items()}
+    kpis['total_employees'] = len(df) if count_column is None else int(kpis['total_employees'])
+    kpis.setdefault('avg_age', 0)
+    kpis.setdefault('avg_tenure', 0)
+    return kpis
+
+
+def group_codes(series):
+    """Code de groupe de chaque ligne (-1 = valeur manquante) et modalités d'une colonne"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series)
+
+
+def kpi_table(df, group_column, count_column=None):
+    """
+    Indicateurs RH par modalité d'une colonne, calculés dans la même passe
+
+    Returns:
+        DataFrame indexé par modalité (groupes vides et valeurs manquantes exclus)
+    """
+    codes, groups = group_codes(df[group_column])
+    kpis = kpi_kernel(df, codes, len(groups), weights=_weights(df, count_column))
+    table = pd.DataFrame(kpis, index=pd.Index(groups, name=group_column))
+    return table[table['total_employees'] > 0]
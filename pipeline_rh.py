@@ -0,0 +1,230 @@
+# Pipeline commun de chargement et de nettoyage des données RH
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from regles_rh import apply_rules
+from snapshot_rh import load_category_dictionary, load_snapshot, save_category_dictionary
+
+# Fichier source par défaut
+SOURCE_FILE = 'Book1.csv'
+
+# Format des dates dans l'export RH
+DATE_FORMAT = '%d/%m/%Y'
+
+# Schéma déclaratif des colonnes de l'export (noms nettoyés)
+#   type : 'str' (texte nettoyé), 'category' (texte à faible cardinalité,
+#          stocké en catégorie avec un dictionnaire stable), 'int' (entier
+#          nullable) ou 'date'
+#   map  : recodage optionnel des valeurs
+SCHEMA = {
+    'Matricule': {'type': 'str'},
+    'Nom': {'type': 'str'},
+    'Prenoms': {'type': 'str'},
+    'Date de naissance': {'type': 'date'},
+    'Lieu de naissance': {'type': 'str'},
+    'Age': {'type': 'int'},
+    'Sexe': {'type': 'category', 'map': {'M': 'Masculin', 'F': 'Féminin'}},
+    'Situation Civile': {'type': 'category'},
+    'DateEntree': {'type': 'date'},
+    'Ancienté': {'type': 'int'},
+    'Poste': {'type': 'str'},
+    'Déparetement': {'type': 'category'},
+    'Direction': {'type': 'category'},
+    'N+1': {'type': 'str'},
+    'Type de contrat': {'type': 'category'},
+    'CSP': {'type': 'category'},
+    'Unité': {'type': 'category'},
+    'Affectation': {'type': 'category'},
+    'SS': {'type': 'str'},
+    'Observation': {'type': 'category'},
+    # Colonne optionnelle : date de départ des employés sortis
+    'Date de sortie': {'type': 'date'},
+}
+
+# Espace de noms du snapshot disque partagé par tous les tableaux de bord
+SNAPSHOT_NAMESPACE = 'pipeline_rh'
+
+# À incrémenter quand le nettoyage change (invalide les snapshots existants)
+PIPELINE_VERSION = 3
+
+
+def _clean_column(series, spec):
+    """Nettoie et type une colonne selon sa spécification du schéma"""
+    column_type = spec.get('type', 'str')
+
+    if column_type == 'date':
+        # Peu de dates distinctes dans un export RH : on ne convertit que les valeurs uniques
+        codes, uniques = pd.factorize(series)
+        parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format=spec.get('format', DATE_FORMAT), errors='coerce')
+        values = parsed.to_numpy()[codes]
+        values[codes < 0] = np.datetime64('NaT')
+        return pd.Series(values, index=series.index, name=series.name)
+
+    if column_type == 'int':
+        return pd.to_numeric(series, errors='coerce').astype('Int64')
+
+    # Texte : suppression des espaces, chaînes vides -> valeur manquante
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return series
+    cleaned = series.str.strip()
+    cleaned = cleaned.mask(cleaned == '')
+    if 'map' in spec:
+        cleaned = cleaned.replace(spec['map'])
+    return cleaned
+
+
+def _clean_category(series, spec, known_categories):
+    """
+    Nettoie une colonne catégorielle en ne traitant que ses valeurs distinctes
+
+    Les modalités déjà connues gardent leur position (et donc leur code) ;
+    les nouvelles sont ajoutées à la fin, triées.
+
+    Returns:
+        (colonne catégorielle, liste complète des modalités)
+    """
+    codes, uniques = pd.factorize(series)
+    labels = _clean_column(pd.Series(uniques, dtype=object), dict(spec, type='str'))
+
+    categories = list(known_categories or [])
+    known = set(categories)
+    categories.extend(sorted(value for value in labels.dropna().unique() if value not in known))
+
+    category_codes = np.full(len(series), -1, dtype=np.int32)
+    if len(uniques) > 0:
+        lookup = pd.Index(categories).get_indexer(labels)
+        category_codes[codes >= 0] = lookup[codes[codes >= 0]]
+
+    column = pd.Categorical.from_codes(category_codes, categories=categories)
+    return pd.Series(column, index=series.index, name=series.name), categories
+
+
+def detect_encoding(filepath, sample_size=64 * 1024):
+    """
+    Détecte l'encodage de l'export RH (UTF-8 avec ou sans BOM, sinon latin-1)
+    """
+    with open(filepath, 'rb') as f:
+        sample = f.read(sample_size)
+
+    if sample.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    try:
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # Un caractère multi-octets coupé en fin d'échantillon n'est pas une erreur
+        if e.start < len(sample) - 3:
+            return 'latin-1'
+    return 'utf-8'
+
+
+def sniff_header(filepath, sep=';'):
+    """
+    Lit uniquement la ligne d'en-tête et repère les colonnes utiles
+
+    Returns:
+        (encodage, positions des colonnes nommées, noms nettoyés correspondants)
+    """
+    encoding = detect_encoding(filepath)
+    with open(filepath, 'r', encoding=encoding, newline='') as f:
+        header = f.readline().rstrip('\r\n')
+
+    positions, names = [], []
+    for position, name in enumerate(header.split(sep)):
+        name = name.strip().strip('"').strip()
+        if name:
+            positions.append(position)
+            names.append(name)
+    return encoding, positions, names
+
+
+def clean_raw_data(filepath):
+    """
+    Lit et nettoie le fichier CSV RH en une seule passe (sans cache)
+
+    Seules les colonnes nommées dans l'en-tête sont lues (les dizaines de champs
+    vides en fin de ligne ne sont jamais matérialisés), puis chaque colonne
+    connue du schéma est nettoyée et typée une seule fois. Les colonnes
+    inconnues sont conservées telles quelles.
+    """
+    encoding, positions, names = sniff_header(filepath)
+
+    # Lecture en texte (moteur C) : le typage est fait ensuite selon le schéma,
+    # sans échec de lecture sur une valeur mal formée
+    df = pd.read_csv(filepath, sep=';', encoding=encoding, engine='c',
+                     header=0, usecols=positions, names=names, dtype=str)
+
+    # Colonnes nommées mais sans aucune valeur, puis lignes vides
+    filled = df.notna().to_numpy()
+    df = df.loc[filled.any(axis=1), filled.any(axis=0)].reset_index(drop=True)
+
+    # Typage colonne par colonne selon le schéma
+    dictionary = load_category_dictionary(filepath)
+    updated = False
+    cleaned = {}
+    for col in df.columns:
+        spec = SCHEMA.get(col)
+        if spec is None:
+            cleaned[col] = df[col]
+        elif spec.get('type') == 'category':
+            cleaned[col], categories = _clean_category(df[col], spec, dictionary.get(col))
+            if categories != dictionary.get(col):
+                dictionary[col] = categories
+                updated = True
+        else:
+            cleaned[col] = _clean_column(df[col], spec)
+
+    # Dictionnaire partagé : les codes restent identiques d'un rechargement à l'autre
+    if updated:
+        save_category_dictionary(filepath, dictionary)
+
+    return pd.DataFrame(cleaned)
+
+
+def add_derived_columns(df, reference_date=None, rules=None):
+    """Ajoute les colonnes calculées (âge, ancienneté, segments, risque)"""
+    today = pd.Timestamp(reference_date or datetime.now())
+
+    # Calcul de l'âge actuel basé sur la date de naissance
+    if 'Date de naissance' in df.columns:
+        df['Age_calcule'] = ((today - df['Date de naissance']).dt.days / 365.25).round().astype('Int64')
+
+    # Calcul de l'ancienneté en années
+    if 'DateEntree' in df.columns:
+        df['Anciennete_calculee'] = ((today - df['DateEntree']).dt.days / 365.25).round(1)
+
+    # Segmentations (génération, statut retraite, ancienneté, risque) : règles vectorisées
+    apply_rules(df, rules)
+
+    return df
+
+
+def load_hr_data(filepath=SOURCE_FILE, reference_date=None, use_snapshot=True):
+    """
+    Charge les données RH nettoyées et enrichies des colonnes calculées
+
+    Args:
+        filepath: Chemin du fichier CSV source
+        reference_date: Date de référence des calculs d'âge et d'ancienneté (aujourd'hui par défaut)
+        use_snapshot: Utiliser le snapshot disque des données nettoyées
+    """
+    if use_snapshot:
+        df = load_snapshot(filepath, clean_raw_data, namespace=SNAPSHOT_NAMESPACE,
+                           variant=f"pipeline-{PIPELINE_VERSION}")
+    else:
+        df = clean_raw_data(filepath)
+
+    return add_derived_columns(df, reference_date)
+
+
+def count_values(series):
+    """
+    Effectifs par valeur, sans les modalités absentes d'une colonne catégorielle
+
+    Équivalent de series.value_counts() pour l'affichage après filtrage.
+    """
+    counts = series.value_counts()
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        counts = counts[counts > 0]
+    return counts
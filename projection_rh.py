@@ -0,0 +1,94 @@
+# Projection vectorisée des départs en retraite (dates exactes au mois près)
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Âge légal de départ par défaut
+RETIREMENT_AGE = 62
+
+# Âges légaux particuliers : [(condition, âge), ...], la première condition vérifiée
+# l'emporte. Une condition est un dictionnaire {colonne: valeur ou liste de valeurs}
+# (combiné en ET), par exemple ({'Sexe': 'Féminin', 'CSP': 'Exécution'}, 60).
+RETIREMENT_AGE_RULES = []
+
+
+def _condition_mask(df, condition):
+    """Masque des lignes vérifiant toutes les égalités d'une condition"""
+    mask = np.ones(len(df), dtype=bool)
+    for column, values in condition.items():
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        if not isinstance(values, (list, tuple, set, frozenset)):
+            values = [values]
+        mask &= df[column].isin(values).to_numpy()
+    return mask
+
+
+def legal_ages(df, rules=None, default_age=RETIREMENT_AGE):
+    """Âge légal de départ de chaque employé selon les règles (en années)"""
+    rules = RETIREMENT_AGE_RULES if rules is None else rules
+    ages = np.full(len(df), np.nan)
+    for condition, age in rules:
+        ages[np.isnan(ages) & _condition_mask(df, condition)] = age
+    ages[np.isnan(ages)] = default_age
+    return ages
+
+
+def retirement_months(df, rules=None, default_age=RETIREMENT_AGE):
+    """
+    Mois de départ en retraite de chaque employé (datetime64[M], NaT si date de naissance inconnue)
+
+    Mois de naissance + âge légal, calculés en une opération sur tout le tableau.
+    """
+    birth_months = df['Date de naissance'].to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    offsets = np.round(legal_ages(df, rules, default_age) * 12).astype('int64').astype('timedelta64[M]')
+    return birth_months + offsets
+
+
+def retirement_schedule(df, horizon=10, reference_date=None, by=None, rules=None, default_age=RETIREMENT_AGE):
+    """
+    Départs en retraite prévus par année civile, sur un horizon quelconque
+
+    Args:
+        df: DataFrame RH (colonne 'Date de naissance')
+        horizon: Nombre d'années projetées, à partir de l'année de référence
+        reference_date: Date de référence (aujourd'hui par défaut)
+        by: Colonne de regroupement (ex: 'Direction') ; None = total
+        rules: Âges légaux particuliers (RETIREMENT_AGE_RULES par défaut)
+        default_age: Âge légal par défaut
+
+    Returns:
+        DataFrame indexé par année : une colonne 'Départs Prévus' et son cumul
+        'Cumul' (by=None), ou une colonne par modalité de by. Les employés ayant
+        déjà atteint l'âge légal sont comptés la première année.
+    """
+    reference_month = np.datetime64(pd.Timestamp(reference_date or datetime.now()), 'M')
+    reference_year = int(reference_month.astype('datetime64[Y]').astype('int64')) + 1970
+    years = pd.Index(range(reference_year, reference_year + horizon), name='Année')
+
+    months = retirement_months(df, rules, default_age)
+    known = ~np.isnat(months)
+    offsets = np.maximum(months[known], reference_month).astype('datetime64[Y]').astype('int64') + 1970 - reference_year
+    in_window = offsets < horizon
+
+    if by is None:
+        counts = np.bincount(offsets[in_window], minlength=horizon)
+        schedule = pd.DataFrame({'Départs Prévus': counts}, index=years)
+        schedule['Cumul'] = schedule['Départs Prévus'].cumsum()
+        return schedule
+
+    # Une seule passe pour toutes les modalités : case (groupe, année)
+    series = df[by]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, groups = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, groups = pd.factorize(series)
+    codes = codes[known][in_window]
+    offsets = offsets[in_window]
+    valid = codes >= 0
+    counts = np.bincount(codes[valid] * horizon + offsets[valid],
+                         minlength=len(groups) * horizon).reshape(len(groups), horizon)
+
+    schedule = pd.DataFrame(counts.T, index=years, columns=pd.Index(groups, name=by))
+    return schedule.loc[:, schedule.sum() > 0]
@@ -0,0 +1,141 @@
+# Pyramide des âges : effectifs précalculés par année d'âge et par sexe
+import numpy as np
+import pandas as pd
+
+# Tranches affichées par défaut : [20, 25), [25, 30), ..., [60, 65)
+PYRAMID_START = 20
+PYRAMID_STOP = 65
+PYRAMID_WIDTH = 5
+
+
+def _codes(series):
+    """Codes et modalités d'une colonne (catégorielle ou non), -1 pour les valeurs manquantes"""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+    return series.cat.codes.to_numpy().astype(np.intp), list(series.cat.categories)
+
+
+def age_sex_cells(df):
+    """
+    Case (année d'âge, sexe) de chaque employé
+
+    Returns:
+        (cases = (âge - âge minimal) x nombre de sexes + code du sexe, -1 si
+        âge ou sexe inconnu ; âge minimal ; nombre d'âges ; modalités du sexe)
+    """
+    ages = np.floor(df['Age_calcule'].to_numpy(dtype='float64', na_value=np.nan))
+    sex_codes, sexes = _codes(df['Sexe'])
+    known = ~np.isnan(ages) & (sex_codes >= 0)
+
+    min_age = int(ages[known].min()) if known.any() else 0
+    n_ages = int(ages[known].max()) - min_age + 1 if known.any() else 0
+    cells = np.full(len(df), -1, dtype=np.intp)
+    cells[known] = (ages[known].astype(np.intp) - min_age) * len(sexes) + sex_codes[known]
+    return cells, min_age, n_ages, sexes
+
+
+def pyramid_table(counts, min_age, sexes, width=PYRAMID_WIDTH, start=PYRAMID_START, stop=PYRAMID_STOP):
+    """
+    Regroupe un tableau (années d'âge x sexes) en tranches [a, a + width)
+
+    Returns:
+        DataFrame indexé par tranche (intervalles fermés à gauche, toutes les
+        tranches couvrant [start, stop), vides comprises), une colonne par sexe
+    """
+    breaks = start + width * np.arange(max(1, int(np.ceil((stop - start) / width))) + 1)
+    table = np.zeros((len(breaks) - 1, len(sexes)), dtype=np.int64)
+
+    # Années d'âge rangées dans leur tranche (les âges hors tranches sont ignorés)
+    ages = min_age + np.arange(len(counts))
+    bins = np.searchsorted(breaks, ages, side='right') - 1
+    inside = (bins >= 0) & (bins < len(breaks) - 1)
+    np.add.at(table, bins[inside], counts[inside])
+
+    index = pd.IntervalIndex.from_breaks(breaks, closed='left', name='Tranche_age')
+    return pd.DataFrame(table, index=index, columns=pd.Index(sexes, name='Sexe'))
+
+
+def age_pyramid(df, width=PYRAMID_WIDTH, start=PYRAMID_START, stop=PYRAMID_STOP):
+    """Tranches d'âge x sexe d'un DataFrame, en un comptage (sans copie ni pd.cut)"""
+    cells, min_age, n_ages, sexes = age_sex_cells(df)
+    counts = np.bincount(cells[cells >= 0], minlength=n_ages * len(sexes)).reshape(n_ages, len(sexes))
+    return pyramid_table(counts, min_age, sexes, width, start, stop)
+
+
+class AgePyramid:
+    """
+    Effectifs par année d'âge et par sexe, précalculés une fois par chargement
+
+    Un tableau (âges x sexes) est conservé pour l'ensemble et pour chaque
+    modalité des colonnes catégorielles de l'index de filtrage. Un filtre sur
+    une seule de ces colonnes (plus le sexe et la plage d'âge, qui sont des axes
+    du tableau) se résout par une somme de tableaux ; les autres combinaisons
+    par un comptage des seules lignes retenues par l'index.
+    """
+
+    def __init__(self, index):
+        """Construit les tableaux à partir de l'index de filtrage (FilterIndex)"""
+        self.index = index
+        self.cells, self.min_age, self.n_ages, self.sexes = age_sex_cells(index.df)
+        n_cells = self.n_ages * len(self.sexes)
+        known = self.cells >= 0
+
+        self.total = np.bincount(self.cells[known], minlength=n_cells).reshape(self.n_ages, len(self.sexes))
+        self.marginals = {}
+        for column, codes in index.codes.items():
+            if column == 'Sexe':
+                continue
+            categories = index.categories[column]
+            codes = codes.astype(np.intp)
+            valid = known & (codes >= 0)
+            counts = np.bincount(codes[valid] * n_cells + self.cells[valid],
+                                 minlength=len(categories) * n_cells)
+            counts = counts.reshape(len(categories), self.n_ages, len(self.sexes))
+            self.marginals[column] = {value: counts[code] for code, value in enumerate(categories)}
+
+    def counts(self, categories=None, ranges=None):
+        """
+        Tableau (années d'âge x sexes) des employés retenus par les filtres
+
+        Mêmes conventions que FilterIndex.select : {colonne: valeur(s) ou None},
+        {colonne: (min, max) ou None}.
+        """
+        categories = {column: values for column, values in (categories or {}).items() if values is not None}
+        ranges = {column: bounds for column, bounds in (ranges or {}).items() if bounds is not None}
+        sex_filter = categories.pop('Sexe', None)
+        age_range = ranges.pop('Age_calcule', None)
+        ranges = {column: bounds for column, bounds in ranges.items()
+                  if column in self.index.sorted_values and not self.index.covers_all(column, *bounds)}
+
+        if not categories and not ranges:
+            counts = self.total.copy()
+        elif len(categories) == 1 and not ranges and next(iter(categories)) in self.marginals:
+            column, values = next(iter(categories.items()))
+            if not isinstance(values, (list, tuple, set, frozenset)):
+                values = [values]
+            counts = np.zeros_like(self.total)
+            for value in values:
+                if value in self.marginals[column]:
+                    counts += self.marginals[column][value]
+        else:
+            positions = self.index.select(categories, ranges)
+            cells = self.cells if positions is None else self.cells[positions]
+            counts = np.bincount(cells[cells >= 0], minlength=self.total.size).reshape(self.total.shape)
+
+        # Le sexe et l'âge sont des axes du tableau : une sélection suffit
+        if sex_filter is not None:
+            if not isinstance(sex_filter, (list, tuple, set, frozenset)):
+                sex_filter = [sex_filter]
+            counts[:, [sex not in sex_filter for sex in self.sexes]] = 0
+        if age_range is not None:
+            low, high = age_range
+            ages = self.min_age + np.arange(self.n_ages)
+            if low is not None:
+                counts[ages < low] = 0
+            if high is not None:
+                counts[ages > high] = 0
+        return counts
+
+    def table(self, categories=None, ranges=None, width=PYRAMID_WIDTH, start=PYRAMID_START, stop=PYRAMID_STOP):
+        """Pyramide par tranches de width années pour un état de filtres"""
+        return pyramid_table(self.counts(categories, ranges), self.min_age, self.sexes, width, start, stop)
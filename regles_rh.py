@@ -0,0 +1,165 @@
+# Moteur de règles vectorisé pour les colonnes de segmentation RH
+import operator
+
+import numpy as np
+import pandas as pd
+
+# Opérateurs de comparaison autorisés dans les conditions
+OPERATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Segmentations calculées à chaque chargement (dans l'ordre du dictionnaire)
+#
+# Deux formes de spécification :
+#   - par tranches : {'column': ..., 'bins': [...], 'labels': [...], 'right': True}
+#     (mêmes conventions que pd.cut, intervalles fermés à droite par défaut)
+#   - par règles   : {'rules': [(label, condition), ...], 'default': label}
+#     la première règle vérifiée l'emporte ; une condition est soit une liste
+#     de tests (colonne, opérateur, valeur) combinés en ET, soit un dictionnaire
+#     {'any': [...]} combiné en OU. Le défaut n'est attribué que si toutes les
+#     colonnes utilisées sont renseignées.
+#
+# Pour ajouter une segmentation, il suffit d'ajouter une entrée à ce
+# dictionnaire ou de passer un dictionnaire équivalent à apply_rules().
+DERIVED_RULES = {
+    'Generation': {
+        'column': 'Age_calcule',
+        'bins': [0, 30, 40, 50, 60, 100],
+        'labels': ['Gen Z/Y', 'Millennials', 'Gen X', 'Baby Boomers', 'Seniors'],
+    },
+    'Statut_Retraite': {
+        'rules': [
+            ('Proche retraite (55+)', [('Age_calcule', '>=', 55)]),
+            ('Mi-carrière (35-54)', [('Age_calcule', '>=', 35)]),
+        ],
+        'default': 'Jeune talent (<35)',
+    },
+    'Segment_Anciennete': {
+        'column': 'Anciennete_calculee',
+        'bins': [-1, 2, 5, 10, 20, 100],
+        'labels': ['Nouveau (0-2 ans)', 'Junior (2-5 ans)', 'Expérimenté (5-10 ans)',
+                   'Senior (10-20 ans)', 'Expert (20+ ans)'],
+    },
+    'Risque_Depart': {
+        'rules': [
+            ('Élevé', {'any': [('Age_calcule', '>=', 55), ('Anciennete_calculee', '<=', 1)]}),
+            ('Moyen', [('Age_calcule', '>=', 45), ('Anciennete_calculee', '<=', 3)]),
+        ],
+        'default': 'Faible',
+    },
+}
+
+
+def _column_values(df, column, cache):
+    """Retourne les valeurs d'une colonne sous forme de tableau NumPy (mis en cache)"""
+    if column not in cache:
+        series = df[column]
+        if pd.api.types.is_numeric_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            cache[column] = series.to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            cache[column] = series.astype(object).to_numpy()
+    return cache[column]
+
+
+def _test_mask(df, test, cache):
+    """Évalue un test (colonne, opérateur, valeur) en masque booléen"""
+    column, op, value = test
+    values = _column_values(df, column, cache)
+    if op == 'in':
+        return pd.Series(values).isin(value).to_numpy()
+    with np.errstate(invalid='ignore'):
+        mask = OPERATORS[op](values, value)
+    return np.asarray(mask, dtype=bool)
+
+
+def _condition_mask(df, condition, cache):
+    """Évalue une condition (liste = ET, {'any': [...]} = OU) en masque booléen"""
+    if isinstance(condition, dict):
+        tests = condition['any']
+        mask = np.zeros(len(df), dtype=bool)
+        for test in tests:
+            mask |= _test_mask(df, test, cache)
+        return mask
+
+    mask = np.ones(len(df), dtype=bool)
+    for test in condition:
+        mask &= _test_mask(df, test, cache)
+    return mask
+
+
+def _condition_columns(condition):
+    """Liste les colonnes utilisées par une condition"""
+    tests = condition['any'] if isinstance(condition, dict) else condition
+    return [test[0] for test in tests]
+
+
+def _evaluate_bins(df, spec, cache):
+    """Segmentation par tranches (équivalent vectorisé de pd.cut)"""
+    values = _column_values(df, spec['column'], cache)
+    bins = np.asarray(spec['bins'], dtype='float64')
+    side = 'left' if spec.get('right', True) else 'right'
+
+    codes = np.searchsorted(bins, values, side=side) - 1
+    codes[(codes < 0) | (codes >= len(spec['labels'])) | np.isnan(values)] = -1
+    return pd.Categorical.from_codes(codes, categories=spec['labels'], ordered=True)
+
+
+def _evaluate_rules(df, spec, cache):
+    """Segmentation par règles ordonnées (la première règle vérifiée l'emporte)"""
+    labels = [label for label, _ in spec['rules']]
+    codes = np.full(len(df), -1, dtype=np.int8)
+    columns = set()
+
+    for code, (_, condition) in enumerate(spec['rules']):
+        mask = _condition_mask(df, condition, cache)
+        codes[(codes == -1) & mask] = code
+        columns.update(_condition_columns(condition))
+
+    if 'default' in spec:
+        valid = np.ones(len(df), dtype=bool)
+        for column in columns:
+            valid &= ~pd.isna(_column_values(df, column, cache))
+        codes[(codes == -1) & valid] = len(labels)
+        labels.append(spec['default'])
+
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def _spec_columns(spec):
+    """Colonnes nécessaires à une spécification"""
+    if 'column' in spec:
+        return [spec['column']]
+    columns = []
+    for _, condition in spec['rules']:
+        columns.extend(_condition_columns(condition))
+    return columns
+
+
+def apply_rules(df, rules=None):
+    """
+    Calcule les colonnes de segmentation en colonnes catégorielles
+
+    Args:
+        df: DataFrame RH (modifié en place et retourné)
+        rules: Dictionnaire {colonne: spécification} (DERIVED_RULES par défaut)
+
+    Les segmentations dont une colonne source est absente sont ignorées.
+    """
+    rules = DERIVED_RULES if rules is None else rules
+    cache = {}
+
+    for name, spec in rules.items():
+        if not all(column in df.columns for column in _spec_columns(spec)):
+            continue
+        if 'column' in spec:
+            df[name] = _evaluate_bins(df, spec, cache)
+        else:
+            df[name] = _evaluate_rules(df, spec, cache)
+
+    return df
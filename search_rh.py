@@ -0,0 +1,128 @@
+# Recherche d'employés : index par préfixe et par trigrammes, insensible aux accents
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Colonnes indexées
+SEARCH_COLUMNS = ['Matricule', 'Nom', 'Prenoms', 'Poste', 'Direction']
+
+# Nombre de résultats proposés
+SEARCH_LIMIT = 50
+
+# Poids d'un mot de la requête trouvé en début de mot (les trigrammes communs valent au plus 1 au total)
+PREFIX_WEIGHT = 2.0
+
+# Part minimale des trigrammes de la requête pour retenir un employé sans préfixe commun
+MIN_SIMILARITY = 0.3
+
+# Trigrammes ignorés : présents chez plus de cette part des employés (aucun pouvoir discriminant)
+COMMON_TRIGRAM_SHARE = 0.5
+
+
+def normalize_text(text):
+    """Mots d'un texte sans accents, en minuscules, ponctuation ôtée"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).split()
+
+
+def trigrams(token):
+    """Trigrammes d'un mot, complété par deux espaces devant et un derrière ('  ab', ' ab', 'ab ')"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class EmployeeSearch:
+    """
+    Index de recherche construit une fois par chargement des données
+
+    - les mots de chaque employé (toutes colonnes indexées confondues), triés :
+      une recherche par préfixe se ramène à deux recherches dichotomiques ;
+    - pour chaque trigramme, les positions des employés qui le contiennent :
+      une faute de frappe ou un mot incomplet garde des trigrammes communs.
+
+    Les résultats sont des positions de lignes (df.iloc), jamais des copies.
+    """
+
+    def __init__(self, df, columns=None):
+        """Normalise les colonnes indexées et construit les deux index"""
+        self.df = df
+        self.size = len(df)
+        columns = [col for col in (SEARCH_COLUMNS if columns is None else columns) if col in df.columns]
+
+        token_list, token_rows = [], []
+        postings = {}
+        for col in columns:
+            for position, text in enumerate(df[col].astype('string').fillna('').tolist()):
+                for token in normalize_text(text):
+                    token_list.append(token)
+                    token_rows.append(position)
+                    for trigram in trigrams(token):
+                        postings.setdefault(trigram, []).append(position)
+
+        order = np.argsort(np.array(token_list, dtype=str), kind='stable')
+        self.tokens = np.array(token_list, dtype=str)[order]
+        self.token_rows = np.array(token_rows, dtype=np.intp)[order]
+        self.postings = {trigram: np.unique(np.array(rows, dtype=np.intp)) for trigram, rows in postings.items()}
+        self.common_size = COMMON_TRIGRAM_SHARE * self.size
+
+        # Libellés affichés dans les listes de sélection
+        def column(name, default):
+            return df[name].astype('string').fillna(default) if name in df.columns else pd.Series(default, index=df.index)
+        nom_complet = (column('Nom', 'N/A') + ' ' + column('Prenoms', 'N/A')).str.strip()
+        self.labels = (nom_complet + ' - ' + column('Poste', 'Non renseigné')
+                       + ' (' + column('Direction', 'Non renseignée') + ')').tolist()
+
+    def prefix_rows(self, prefix):
+        """Positions (avec doublons) des employés ayant un mot qui commence par prefix"""
+        start = np.searchsorted(self.tokens, prefix, side='left')
+        stop = np.searchsorted(self.tokens, prefix + '\uffff', side='left')
+        return self.token_rows[start:stop]
+
+    def search(self, query, limit=SEARCH_LIMIT, positions=None):
+        """
+        Employés les plus proches d'une requête
+
+        Chaque mot de la requête trouvé en début d'un mot de l'employé compte
+        PREFIX_WEIGHT ; s'y ajoute la part des trigrammes de la requête présents
+        chez l'employé (accents, casse et ponctuation ignorés). Un employé sans
+        mot commençant comme la requête doit en partager MIN_SIMILARITY des trigrammes.
+
+        Args:
+            query: Texte saisi (matricule, nom, prénom, poste, direction)
+            limit: Nombre maximal de résultats
+            positions: Positions des employés éligibles (None = tous), par exemple FilterIndex.select
+
+        Returns:
+            Positions des meilleurs résultats, du plus pertinent au moins pertinent
+            (les premiers employés éligibles si la requête est vide)
+        """
+        candidates = np.arange(self.size) if positions is None else np.asarray(positions, dtype=np.intp)
+        tokens = normalize_text(query or '')
+        if not tokens:
+            return candidates[:limit]
+
+        # Un seul comptage pondéré : préfixes (une fois par employé et par mot) et trigrammes
+        prefix_hits = [np.unique(self.prefix_rows(token)) for token in tokens]
+        query_trigrams = set().union(*(trigrams(token) for token in tokens))
+        trigram_hits = [self.postings[trigram] for trigram in query_trigrams
+                        if trigram in self.postings and len(self.postings[trigram]) <= self.common_size]
+        rows = np.concatenate(prefix_hits + trigram_hits)
+        if len(rows) == 0:
+            return rows
+        weights = np.repeat([PREFIX_WEIGHT] * len(prefix_hits) + [1.0 / len(query_trigrams)] * len(trigram_hits),
+                            [len(hits) for hits in prefix_hits + trigram_hits])
+        scores = np.bincount(rows, weights=weights, minlength=self.size)
+
+        candidate_scores = scores[candidates]
+        found = np.flatnonzero(candidate_scores >= MIN_SIMILARITY)
+        if len(found) > limit:
+            found = found[np.argpartition(-candidate_scores[found], limit - 1)[:limit]]
+        # Tri par score décroissant, puis par position
+        found = found[np.lexsort((candidates[found], -candidate_scores[found]))]
+        return candidates[found]
+
+    def row(self, position):
+        """Ligne d'un employé par sa position"""
+        return self.df.iloc[position]
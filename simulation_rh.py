@@ -0,0 +1,180 @@
+# Simulation Monte Carlo des départs (taux de départ par segment âge / ancienneté / CSP)
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from kpi_rh import departure_flags
+
+# Segments d'estimation des taux de départ (tranches fermées à droite, comme pd.cut)
+AGE_BINS = [0, 30, 40, 50, 60, 200]
+TENURE_BINS = [-1, 2, 5, 10, 20, 200]
+
+# Durée (en années) couverte par les observations de départ de l'export
+OBSERVATION_YEARS = 1
+
+# Poids du taux global dans l'estimation des petits segments (effectif fictif)
+PRIOR_WEIGHT = 10
+
+# Nombre de trajectoires par tâche : le découpage (et donc le résultat pour une
+# graine donnée) ne dépend pas du nombre de processus
+CHUNK_RUNS = 500
+
+# Percentiles retournés
+PERCENTILES = [5, 50, 95]
+
+
+def _bands(values, bins):
+    """Indice de tranche de chaque valeur (-1 si manquante ou hors tranches)"""
+    codes = np.searchsorted(np.asarray(bins, dtype='float64'), values, side='left') - 1
+    codes[(codes < 0) | (codes >= len(bins) - 1) | np.isnan(values)] = -1
+    return codes
+
+
+def _segment_codes(age, tenure, csp_codes, n_csp):
+    """Code de segment (tranche d'âge x tranche d'ancienneté x CSP), -1 si incomplet"""
+    age_bands = _bands(age, AGE_BINS)
+    tenure_bands = _bands(tenure, TENURE_BINS)
+    codes = (age_bands * (len(TENURE_BINS) - 1) + tenure_bands) * n_csp + csp_codes
+    codes[(age_bands < 0) | (tenure_bands < 0) | (csp_codes < 0)] = -1
+    return codes
+
+
+def _values(df):
+    """Âge, ancienneté et codes CSP de chaque employé"""
+    age = df['Age_calcule'].to_numpy(dtype='float64', na_value=np.nan)
+    tenure = df['Anciennete_calculee'].to_numpy(dtype='float64', na_value=np.nan)
+    csp = df['CSP'].astype('category')
+    return age, tenure, csp.cat.codes.to_numpy(), len(csp.cat.categories)
+
+
+def estimate_hazards(df):
+    """
+    Taux annuels de départ par segment, estimés sur les départs de l'export
+
+    Un segment peu représenté est rapproché du taux global :
+    (départs + PRIOR_WEIGHT x taux global) / (exposition + PRIOR_WEIGHT).
+
+    Returns:
+        (taux indexés par code de segment (voir _segment_codes), taux global)
+    """
+    age, tenure, csp_codes, n_csp = _values(df)
+    segments = _segment_codes(age, tenure, csp_codes, n_csp)
+    departed = departure_flags(df)
+
+    n_segments = (len(AGE_BINS) - 1) * (len(TENURE_BINS) - 1) * n_csp
+    known = segments >= 0
+    exposure = np.bincount(segments[known], minlength=n_segments) * OBSERVATION_YEARS
+    departures = np.bincount(segments[known], weights=departed[known], minlength=n_segments)
+
+    overall = departures.sum() / exposure.sum() if exposure.sum() > 0 else 0.0
+    return (departures + PRIOR_WEIGHT * overall) / (exposure + PRIOR_WEIGHT), overall
+
+
+def build_cohorts(df, horizon, by='Direction'):
+    """
+    Regroupe les employés présents en cohortes de même groupe et même trajectoire de risque
+
+    Returns:
+        (effectifs, taux (cohortes x années), codes de groupe, modalités du groupe)
+    """
+    hazards, overall = estimate_hazards(df)
+    age, tenure, csp_codes, n_csp = _values(df)
+
+    # Seuls les employés sans départ enregistré sont projetés
+    present = ~departure_flags(df)
+    group = df[by].astype('category')
+    group_codes = group.cat.codes.to_numpy()
+    present &= group_codes >= 0
+
+    yearly = np.empty((int(present.sum()), horizon))
+    for year in range(horizon):
+        segments = _segment_codes(age[present] + year, tenure[present] + year, csp_codes[present], n_csp)
+        # Segment incomplet (âge, ancienneté ou CSP inconnu) : taux global
+        yearly[:, year] = np.where(segments >= 0, hazards[np.maximum(segments, 0)], overall)
+
+    # Les employés d'un même groupe suivant la même trajectoire forment une cohorte
+    keys = np.column_stack([group_codes[present], yearly])
+    cohorts, inverse = np.unique(keys, axis=0, return_inverse=True)
+    counts = np.bincount(inverse.ravel(), minlength=len(cohorts))
+
+    # Seules les modalités ayant des employés présents sont conservées
+    used, group_codes = np.unique(cohorts[:, 0].astype(np.intp), return_inverse=True)
+    groups = [group.cat.categories[code] for code in used]
+    return counts, cohorts[:, 1:], group_codes.ravel(), groups
+
+
+def _simulate_chunk(counts, hazards, group_codes, n_groups, runs, seed):
+    """
+    Simule un lot de trajectoires (exécuté dans un processus de travail)
+
+    Chaque année, les départs d'une cohorte suivent une loi binomiale sur son
+    effectif restant : toutes les trajectoires et cohortes sont tirées d'un coup.
+
+    Returns:
+        (effectifs fin d'année, départs de l'année), tableaux runs x groupes x années
+    """
+    rng = np.random.default_rng(seed)
+    horizon = hazards.shape[1]
+    membership = np.zeros((len(counts), n_groups))
+    membership[np.arange(len(counts)), group_codes] = 1
+
+    remaining = np.broadcast_to(counts, (runs, len(counts))).copy()
+    headcount = np.empty((runs, n_groups, horizon), dtype=np.int32)
+    departures = np.empty((runs, n_groups, horizon), dtype=np.int32)
+    for year in range(horizon):
+        leaving = rng.binomial(remaining, hazards[:, year])
+        remaining -= leaving
+        headcount[:, :, year] = remaining @ membership
+        departures[:, :, year] = leaving @ membership
+    return headcount, departures
+
+
+def simulate_attrition(df, horizon=5, runs=10000, seed=0, by='Direction', workers=None, reference_date=None):
+    """
+    Simule l'évolution des effectifs par départs aléatoires (sans recrutements)
+
+    Args:
+        df: DataFrame RH
+        horizon: Nombre d'années simulées
+        runs: Nombre de trajectoires
+        seed: Graine (résultat identique quel que soit le nombre de processus)
+        by: Colonne de regroupement des résultats
+        workers: Nombre de processus (None = nombre de cœurs, 1 = sans processus)
+        reference_date: Date de référence (aujourd'hui par défaut)
+
+    Returns:
+        Dictionnaire {'Effectif': DataFrame, 'Départs': DataFrame}, indexés par
+        (groupe, année) avec une colonne par percentile (P5, P50, P95) et la
+        moyenne ; le groupe 'Total' couvre l'ensemble du périmètre.
+    """
+    counts, hazards, group_codes, groups = build_cohorts(df, horizon, by)
+
+    chunks = [min(CHUNK_RUNS, runs - start) for start in range(0, runs, CHUNK_RUNS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(counts, hazards, group_codes, len(groups), size, chunk_seed) for size, chunk_seed in zip(chunks, seeds)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            results = list(pool.map(_simulate_chunk, *zip(*tasks)))
+    else:
+        results = [_simulate_chunk(*task) for task in tasks]
+
+    reference_year = pd.Timestamp(reference_date or datetime.now()).year
+    years = list(range(reference_year + 1, reference_year + horizon + 1))
+    index = pd.MultiIndex.from_product([groups + ['Total'], years], names=[by, 'Année'])
+
+    bands = {}
+    for position, name in enumerate(['Effectif', 'Départs']):
+        values = np.concatenate([result[position] for result in results])
+        values = np.concatenate([values, values.sum(axis=1, keepdims=True)], axis=1)
+        table = pd.DataFrame(
+            np.percentile(values, PERCENTILES, axis=0).reshape(len(PERCENTILES), -1).T,
+            index=index, columns=[f"P{percentile}" for percentile in PERCENTILES])
+        table['Moyenne'] = values.mean(axis=0).ravel()
+        bands[name] = table
+    return bands
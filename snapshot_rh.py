@@ -0,0 +1,185 @@
+# Cache disque des données RH nettoyées (snapshot Parquet)
+import hashlib
+import json
+import os
+import glob
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (moteur Parquet utilisé par pandas)
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Dossier des snapshots, créé à côté du fichier source
+SNAPSHOT_DIRNAME = '.cache_rh'
+
+# À incrémenter si le format des snapshots change
+SNAPSHOT_VERSION = 1
+
+# Dictionnaire partagé des modalités des colonnes catégorielles
+DICTIONARY_FILENAME = 'dictionnaire_categories.json'
+
+
+def file_signature(filepath, known=None):
+    """
+    Calcule la signature (taille, mtime, empreinte du contenu) d'un fichier
+
+    Si une signature connue a la même taille et le même mtime, son empreinte
+    est réutilisée sans relire le fichier.
+    """
+    stat = os.stat(filepath)
+    signature = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    if known and known.get('size') == signature['size'] and known.get('mtime_ns') == signature['mtime_ns']:
+        signature['hash'] = known['hash']
+        return signature
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    signature['hash'] = digest.hexdigest()
+    return signature
+
+
+def _snapshot_dir(filepath, cache_dir=None):
+    """Retourne le dossier des snapshots pour un fichier source"""
+    if cache_dir:
+        return cache_dir
+    return os.path.join(os.path.dirname(os.path.abspath(filepath)), SNAPSHOT_DIRNAME)
+
+
+def _read_index(index_path):
+    """Lit l'index des signatures connues (vide si absent ou illisible)"""
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _atomic_write(path, write_fn):
+    """Écrit un fichier via un fichier temporaire puis un renommage atomique"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write_fn(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_snapshot(filepath, builder, namespace, variant=None, cache_dir=None):
+    """
+    Charge le DataFrame nettoyé depuis le snapshot Parquet, ou le reconstruit
+
+    Args:
+        filepath: Chemin du fichier source (CSV)
+        builder: Fonction builder(filepath) qui lit et nettoie le fichier source
+        namespace: Nom du pipeline de nettoyage (un snapshot par pipeline)
+        variant: Élément de clé supplémentaire (ex: date de référence des calculs)
+        cache_dir: Dossier des snapshots (par défaut .cache_rh à côté du fichier)
+
+    Le snapshot est indexé par la taille, le mtime et l'empreinte du contenu du
+    fichier source : le CSV n'est relu que s'il a réellement changé.
+    """
+    if not PARQUET_AVAILABLE:
+        return builder(filepath)
+
+    snapshot_dir = _snapshot_dir(filepath, cache_dir)
+    index_path = os.path.join(snapshot_dir, f"{namespace}.index.json")
+    index = _read_index(index_path)
+    source_key = os.path.abspath(filepath)
+
+    signature = file_signature(filepath, index.get(source_key))
+    key_parts = [namespace, f"v{SNAPSHOT_VERSION}", signature['hash']]
+    if variant:
+        key_parts.append(str(variant))
+    snapshot_key = hashlib.blake2b('|'.join(key_parts).encode('utf-8'), digest_size=12).hexdigest()
+    snapshot_path = os.path.join(snapshot_dir, f"{namespace}-{snapshot_key}.parquet")
+    entry = dict(signature, snapshot=os.path.basename(snapshot_path))
+
+    # Lecture du snapshot existant
+    if os.path.exists(snapshot_path):
+        try:
+            df = pd.read_parquet(snapshot_path)
+            if index.get(source_key) != entry:
+                _save_index(index_path, index, source_key, entry)
+            return df
+        except Exception:
+            # Snapshot corrompu : on le reconstruit
+            pass
+
+    previous = index.get(source_key) or {}
+    df = builder(filepath)
+    if df is None:
+        return df
+
+    # Écriture du nouveau snapshot (les erreurs d'écriture ne bloquent pas le chargement)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        _atomic_write(snapshot_path, lambda path: df.to_parquet(path, index=True))
+        index = _save_index(index_path, index, source_key, entry)
+        _prune_snapshots(snapshot_dir, index, previous.get('snapshot'), keep=entry['snapshot'])
+    except Exception:
+        pass
+
+    return df
+
+
+def _save_index(index_path, index, source_key, entry):
+    """Enregistre la signature courante du fichier source et son snapshot dans l'index"""
+    index = dict(index)
+    index[source_key] = entry
+    _atomic_write(index_path, lambda path: _write_json(path, index))
+    return index
+
+
+def _write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def _prune_snapshots(snapshot_dir, index, previous, keep):
+    """
+    Supprime l'ancien snapshot d'un fichier source
+
+    Seul le snapshot précédemment enregistré pour ce fichier est supprimé, et
+    seulement si aucun autre fichier source de l'index ne l'utilise encore
+    (deux fichiers de même contenu partagent leur snapshot).
+    """
+    if not previous or previous == keep:
+        return
+    if any(entry.get('snapshot') == previous for entry in index.values()):
+        return
+    try:
+        os.remove(os.path.join(snapshot_dir, previous))
+    except OSError:
+        pass
+
+
+def clear_snapshots(filepath, cache_dir=None):
+    """Supprime tous les snapshots associés au dossier du fichier source"""
+    snapshot_dir = _snapshot_dir(filepath, cache_dir)
+    for path in glob.glob(os.path.join(snapshot_dir, '*.parquet')) + glob.glob(os.path.join(snapshot_dir, '*.index.json')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def load_category_dictionary(filepath, cache_dir=None):
+    """Charge le dictionnaire des modalités {colonne: [valeurs]} (vide si absent)"""
+    return _read_index(os.path.join(_snapshot_dir(filepath, cache_dir), DICTIONARY_FILENAME))
+
+
+def save_category_dictionary(filepath, dictionary, cache_dir=None):
+    """Enregistre le dictionnaire des modalités (les erreurs d'écriture sont ignorées)"""
+    snapshot_dir = _snapshot_dir(filepath, cache_dir)
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        _atomic_write(os.path.join(snapshot_dir, DICTIONARY_FILENAME), lambda path: _write_json(path, dictionary))
+    except OSError:
+        pass
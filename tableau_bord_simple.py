@@ -1,7 +1,6 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-from datetime import datetime
 import os
+from pipeline_rh import count_values, load_hr_data
 
 class TableauBordRHSimple:
     """Version simplifiée du tableau de bord RH avec matplotlib uniquement"""
@@ -9,8 +8,6 @@ class TableauBordRHSimple:
     def __init__(self, filepath):
         """Initialise l'analyse avec le fichier CSV"""
         self.df = self.load_and_clean_data(filepath)
-        if self.df is not None:
-            self.prepare_additional_columns()
     
     def load_and_clean_data(self, filepath):
         """Charge et nettoie les données RH"""
@@ -20,34 +17,8 @@ class TableauBordRHSimple:
                 print(f"Erreur: Le fichier {filepath} n'existe pas.")
                 return None
             
-            # Chargement du fichier CSV
-            df = pd.read_csv(filepath, sep=';', encoding='latin-1')
-            print(f"Fichier chargé: {len(df)} lignes, {len(df.columns)} colonnes")
-            
-            # Afficher les premières colonnes pour déboguer
-            print("Colonnes disponibles:", list(df.columns[:10]))
-            
-            # Suppression des colonnes complètement vides
-            df = df.dropna(how='all', axis=1)
-            
-            # Suppression des lignes complètement vides
-            df = df.dropna(how='all')
-            
-            # Nettoyage des noms de colonnes
-            df.columns = df.columns.str.strip()
-            
-            # Conversion des dates
-            if 'Date de naissance' in df.columns:
-                df['Date de naissance'] = pd.to_datetime(df['Date de naissance'], format='%d/%m/%Y', errors='coerce')
-            
-            if 'DateEntree' in df.columns:
-                df['DateEntree'] = pd.to_datetime(df['DateEntree'], format='%d/%m/%Y', errors='coerce')
-            
-            # Nettoyage des colonnes textuelles
-            text_columns = ['Sexe', 'Situation Civile', 'Type de contrat', 'Direction']
-            for col in text_columns:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).str.strip()
+            # Pipeline commun : nettoyage, typage et colonnes calculées (snapshot disque partagé)
+            df = load_hr_data(filepath)
             
             print(f"Données nettoyées: {len(df)} employés")
             return df
@@ -56,21 +27,6 @@ class TableauBordRHSimple:
             print(f"Erreur lors du chargement: {e}")
             return None
     
-    def prepare_additional_columns(self):
-        """Prépare des colonnes supplémentaires pour l'analyse"""
-        # Calcul de l'âge actuel
-        if 'Date de naissance' in self.df.columns:
-            today = datetime.now()
-            self.df['Age_calcule'] = ((today - self.df['Date de naissance']).dt.days / 365.25).round()
-        
-        # Calcul de l'ancienneté
-        if 'DateEntree' in self.df.columns:
-            self.df['Anciennete_calculee'] = ((datetime.now() - self.df['DateEntree']).dt.days / 365.25).round(1)
-        
-        # Standardisation du sexe
-        if 'Sexe' in self.df.columns:
-            self.df['Sexe'] = self.df['Sexe'].map({'M': 'Masculin', 'F': 'Féminin'}).fillna(self.df['Sexe'])
-    
     def afficher_statistiques_generales(self):
         """Affiche les statistiques générales"""
         print("\n" + "="*60)
@@ -92,7 +48,7 @@ class TableauBordRHSimple:
         # Répartition par sexe
         if 'Sexe' in self.df.columns:
             print(f"\n👥 RÉPARTITION PAR SEXE:")
-            sexe_counts = self.df['Sexe'].value_counts()
+            sexe_counts = count_values(self.df['Sexe'])
             for sexe, count in sexe_counts.items():
                 percentage = (count / len(self.df)) * 100
                 print(f"   {sexe}: {count} employés ({percentage:.1f}%)")
@@ -100,7 +56,7 @@ class TableauBordRHSimple:
         # Répartition par type de contrat
         if 'Type de contrat' in self.df.columns:
             print(f"\n📋 TYPES DE CONTRAT:")
-            contrat_counts = self.df['Type de contrat'].value_counts()
+            contrat_counts = count_values(self.df['Type de contrat'])
             for contrat, count in contrat_counts.items():
                 percentage = (count / len(self.df)) * 100
                 print(f"   {contrat}: {count} employés ({percentage:.1f}%)")
@@ -108,7 +64,7 @@ class TableauBordRHSimple:
         # Top 5 des directions
         if 'Direction' in self.df.columns:
             print(f"\n🏢 TOP 5 DES DIRECTIONS:")
-            direction_counts = self.df['Direction'].value_counts().head(5)
+            direction_counts = count_values(self.df['Direction']).head(5)
             for direction, count in direction_counts.items():
                 percentage = (count / len(self.df)) * 100
                 print(f"   {direction}: {count} employés ({percentage:.1f}%)")
@@ -121,7 +77,7 @@ class TableauBordRHSimple:
         
         # 1. Répartition par sexe
         if 'Sexe' in self.df.columns:
-            sexe_counts = self.df['Sexe'].value_counts()
+            sexe_counts = count_values(self.df['Sexe'])
             colors = ['lightblue', 'pink']
             axes[0, 0].pie(sexe_counts.values, labels=sexe_counts.index, autopct='%1.1f%%', colors=colors)
             axes[0, 0].set_title('👥 Répartition par sexe')
@@ -137,7 +93,7 @@ class TableauBordRHSimple:
         
         # 3. Top 10 des directions
         if 'Direction' in self.df.columns:
-            direction_counts = self.df['Direction'].value_counts().head(10)
+            direction_counts = count_values(self.df['Direction']).head(10)
             y_pos = range(len(direction_counts))
             axes[1, 0].barh(y_pos, direction_counts.values, color='lightcoral')
             axes[1, 0].set_yticks(y_pos)
@@ -148,7 +104,7 @@ class TableauBordRHSimple:
         
         # 4. Types de contrat
         if 'Type de contrat' in self.df.columns:
-            contrat_counts = self.df['Type de contrat'].value_counts()
+            contrat_counts = count_values(self.df['Type de contrat'])
             axes[1, 1].bar(range(len(contrat_counts)), contrat_counts.values, color='lightgreen')
             axes[1, 1].set_xticks(range(len(contrat_counts)))
             axes[1, 1].set_xticklabels(contrat_counts.index, rotation=45, ha='right')
@@ -180,7 +136,7 @@ class TableauBordRHSimple:
         
         # Raisons de départ
         print(f"\n📋 RAISONS DE DÉPART:")
-        raisons = departs['Observation'].value_counts()
+        raisons = count_values(departs['Observation'])
         for raison, count in raisons.items():
             percentage = (count / len(departs)) * 100
             print(f"   {raison}: {count} ({percentage:.1f}%)")
@@ -0,0 +1,104 @@
+# Historique des effectifs reconstruit à partir des entrées et des départs (journal d'événements)
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from kpi_rh import departure_flags
+
+# Date de sortie des employés partis (colonne optionnelle de l'export)
+EXIT_DATE_COLUMN = 'Date de sortie'
+
+# Colonnes pour lesquelles les séries mensuelles sont précalculées
+TIMELINE_COLUMNS = ['Direction', 'CSP']
+
+
+class HeadcountTimeline:
+    """
+    Journal trié des entrées et sorties, et effectifs mensuels cumulés
+
+    L'effectif à une date est le nombre d'entrées moins le nombre de sorties
+    jusqu'à cette date : deux recherches dichotomiques dans le journal trié.
+    Les séries mensuelles (total et par modalité de TIMELINE_COLUMNS) sont des
+    sommes cumulées calculées une fois ; une période n'est qu'une tranche.
+
+    Un départ sans date de sortie (colonne EXIT_DATE_COLUMN absente ou vide) est
+    compté au mois de la date de référence (date de l'export).
+    """
+
+    def __init__(self, df, columns=None, reference_date=None):
+        """Construit le journal d'événements et les tableaux cumulés"""
+        self.reference_month = np.datetime64(pd.Timestamp(reference_date or datetime.now()), 'M')
+
+        entries = df['DateEntree'].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        known = ~np.isnat(entries)
+
+        exits = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[D]')
+        if EXIT_DATE_COLUMN in df.columns:
+            exits = df[EXIT_DATE_COLUMN].to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+        if 'Observation' in df.columns:
+            undated = departure_flags(df) & np.isnat(exits)
+            exits[undated] = self.reference_month.astype('datetime64[D]')
+
+        self.entries = entries[known]
+        self.exits = exits[known]
+        self.entry_log = np.sort(self.entries)
+        self.exit_log = np.sort(self.exits[~np.isnat(self.exits)])
+
+        # Grille mensuelle, du premier mois d'entrée au mois de référence
+        first_month = self.entry_log[0].astype('datetime64[M]') if len(self.entry_log) else self.reference_month
+        self.months = np.arange(first_month, self.reference_month + 1, dtype='datetime64[M]')
+        self.series = {None: self._cumulate(np.zeros(len(self.entries), dtype=np.intp), [None])}
+        for column in (TIMELINE_COLUMNS if columns is None else columns):
+            if column in df.columns:
+                group = df[column].astype('category')
+                codes = group.cat.codes.to_numpy().astype(np.intp)[known]
+                self.series[column] = self._cumulate(codes, list(group.cat.categories))
+
+    def _month_positions(self, dates):
+        """Position de chaque date dans la grille mensuelle (-1 si absente ou hors grille)"""
+        positions = (dates.astype('datetime64[M]') - self.months[0]).astype('int64')
+        positions[np.isnat(dates) | (positions < 0) | (positions >= len(self.months))] = -1
+        return positions
+
+    def _cumulate(self, codes, groups):
+        """Entrées, sorties et effectif par groupe et par mois (une somme cumulée par série)"""
+        n_months = len(self.months)
+        counts = {}
+        for name, dates in (('Entrées', self.entries), ('Départs', self.exits)):
+            positions = self._month_positions(dates)
+            valid = (positions >= 0) & (codes >= 0)
+            counts[name] = np.bincount(codes[valid] * n_months + positions[valid],
+                                       minlength=len(groups) * n_months).reshape(len(groups), n_months)
+        counts['Effectif'] = np.cumsum(counts['Entrées'] - counts['Départs'], axis=1)
+        counts['groups'] = groups
+        return counts
+
+    def headcount_at(self, date):
+        """Effectif à une date donnée (entrées et sorties jusqu'à cette date incluse)"""
+        date = np.datetime64(pd.Timestamp(date), 'D')
+        return int(np.searchsorted(self.entry_log, date, side='right')
+                   - np.searchsorted(self.exit_log, date, side='right'))
+
+    def monthly(self, column=None, measure='Effectif', start=None, end=None):
+        """
+        Série mensuelle d'une mesure ('Effectif', 'Entrées' ou 'Départs')
+
+        Args:
+            column: Colonne de regroupement précalculée (None = total)
+            start, end: Bornes de la période (dates incluses, toute la grille par défaut)
+
+        Returns:
+            DataFrame indexé par mois (premier jour), une colonne par modalité
+            ('Total' si column est None)
+        """
+        series = self.series[column]
+        first = 0 if start is None else int(np.searchsorted(self.months, np.datetime64(pd.Timestamp(start), 'M')))
+        last = len(self.months) if end is None else int(np.searchsorted(self.months, np.datetime64(pd.Timestamp(end), 'M'), side='right'))
+
+        values = series[measure][:, first:last]
+        columns = ['Total'] if column is None else pd.Index(series['groups'], name=column)
+        table = pd.DataFrame(values.T, index=pd.DatetimeIndex(self.months[first:last], name='Mois'), columns=columns)
+        if column is not None:
+            table = table.loc[:, series['Effectif'].any(axis=1) | series['Entrées'].any(axis=1)]
+        return table